@@ -0,0 +1,301 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from agents.model_registry import get_resource
+from agents.openai_agent import (
+    EVENT_ARTICLE_MAX_TOKENS,
+    EVENT_PARAMS,
+    LLM_CACHE_DETERMINISTIC,
+    cached_response,
+    chat_completion,
+    estimate_tokens,
+    event_cache_input,
+    extract_structured_events,
+    is_event_text,
+    store_response,
+    truncate_to_tokens,
+)
+
+# "batch": several articles per GPT-4o call; "concurrent": one call per article, in parallel
+EVENT_EXTRACTION_MODE = os.getenv("EVENT_EXTRACTION_MODE", "batch")
+# Input tokens (estimated) packed into one batched prompt
+EVENT_BATCH_TOKEN_BUDGET = int(os.getenv("EVENT_BATCH_TOKEN_BUDGET", "6000"))
+EVENT_MAX_BATCH_SIZE = int(os.getenv("EVENT_MAX_BATCH_SIZE", "8"))
+EVENT_MAX_WAIT_MS = float(os.getenv("EVENT_MAX_WAIT_MS", "200"))
+# GPT-4o calls in flight at once, in either mode
+EVENT_MAX_CONCURRENT = int(os.getenv("EVENT_MAX_CONCURRENT", "4"))
+# Completion tokens allowed per article in a batch
+EVENT_TOKENS_PER_ARTICLE = 250
+# Seconds a caller waits for an article's events before giving up on them
+EVENT_RESULT_TIMEOUT = float(os.getenv("EVENT_RESULT_TIMEOUT", "120"))
+
+BATCH_INSTRUCTION = (
+    "Extract 3 to 5 key events from each news article below. Each event should follow this format:\n"
+    "[Actor] performed [Action] on [Date] at [Location], due to [Reason].\n\n"
+    'Return a JSON object of the form {"articles": [{"id": "<article id>", "events": ["<event>", ...]}]} '
+    "with exactly one entry per article id.\n\n"
+    "Articles (JSON):\n"
+)
+
+
+def parse_batch_response(response: str, ids: List[str]) -> Dict[str, str]:
+    """
+    Events per article id from a batched JSON answer, as newline-separated
+    lines like the single-article prompt returns. Ids the answer skipped or
+    left empty are missing from the result.
+    """
+    data = json.loads(response)
+    events = {}
+    for entry in data.get("articles", []):
+        article_id = str(entry.get("id", ""))
+        lines = entry.get("events") or []
+        if isinstance(lines, str):
+            lines = lines.split("\n")
+        lines = [str(line).strip() for line in lines if str(line).strip()]
+        if article_id in ids and lines:
+            events[article_id] = "\n".join(lines)
+    return events
+
+
+def _fail(items: List[Tuple[str, Future]], error: BaseException):
+    """Fail the futures in ``items`` that are still unresolved."""
+    for _, future in items:
+        try:
+            if not future.done():
+                future.set_exception(error)
+        except InvalidStateError:
+            pass
+
+
+def _copy_result(source: Future, target: Future):
+    try:
+        error = source.exception()
+        if error is not None:
+            target.set_exception(error)
+        else:
+            target.set_result(source.result())
+    except InvalidStateError:
+        pass
+
+
+class EventExtractionEngine:
+    """
+    Collects articles submitted from any thread and extracts their events
+    with as few GPT-4o calls as possible.
+
+    In "batch" mode a collector thread waits up to ``max_wait_ms`` for
+    concurrent submissions, then packs the (truncated) articles into JSON
+    prompts of at most ``token_budget`` estimated tokens and
+    ``max_batch_size`` articles. Articles a batched answer does not cover,
+    or all of them if it cannot be parsed, are retried with the
+    single-article prompt, each on its own call slot. In "concurrent" mode
+    every article gets its own call. Either way at most ``max_concurrent``
+    calls run at once.
+
+    Articles already in the per-article "event" response cache are answered
+    from it without being queued, and each article's share of a batched
+    answer is written back under its own "event" key, so single and batched
+    extraction share one cache.
+
+    Futures resolve to newline-separated events, or "" when the model call
+    fails; they only raise if the engine itself breaks.
+    """
+
+    def __init__(
+        self,
+        mode: str = EVENT_EXTRACTION_MODE,
+        token_budget: int = EVENT_BATCH_TOKEN_BUDGET,
+        article_max_tokens: int = EVENT_ARTICLE_MAX_TOKENS,
+        max_batch_size: int = EVENT_MAX_BATCH_SIZE,
+        max_wait_ms: float = EVENT_MAX_WAIT_MS,
+        max_concurrent: int = EVENT_MAX_CONCURRENT,
+    ):
+        self.mode = mode
+        self.token_budget = token_budget
+        self.article_max_tokens = article_max_tokens
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches_run = 0
+        self.articles_sent = 0
+        self.articles_batched = 0
+        self.single_calls = 0
+        self.fallbacks = 0
+        self.cache_hits = 0
+
+        self._calls = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="event-extraction")
+        self._pending: List[Tuple[str, Future]] = []
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        # Batches submitted to a call slot and not finished yet
+        self._in_flight = 0
+
+    def submit(self, text: str) -> Future:
+        if self.mode != "batch" or not is_event_text(text):
+            return self._calls.submit(self._single, text)
+
+        future = Future()
+        text = event_cache_input(text)
+        cached = cached_response("event", text, **EVENT_PARAMS)
+        if cached is not None:
+            with self._condition:
+                self.cache_hits += 1
+            future.set_result(cached)
+            return future
+
+        with self._condition:
+            self._pending.append((text, future))
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="event-batcher", daemon=True)
+                self._worker.start()
+            self._condition.notify()
+        return future
+
+    def extract(self, text: str) -> str:
+        return self.submit(text).result(timeout=EVENT_RESULT_TIMEOUT)
+
+    def _single(self, text: str) -> str:
+        with self._condition:
+            self.single_calls += 1
+        return extract_structured_events(text)
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+
+            # A lone article with nothing else in flight has nothing to wait for
+            if len(self._pending) == 1 and self._in_flight == 0:
+                pending, self._pending = self._pending, []
+                return pending
+
+            deadline = time.monotonic() + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            pending, self._pending = self._pending, []
+        return pending
+
+    def _pack(self, pending: List[Tuple[str, Future]]) -> List[List[Tuple[str, Future]]]:
+        """Greedy packing in arrival order under the token budget and batch size."""
+        batches, batch, tokens = [], [], 0
+        for text, future in pending:
+            cost = estimate_tokens(truncate_to_tokens(text, self.article_max_tokens))
+            if batch and (tokens + cost > self.token_budget or len(batch) >= self.max_batch_size):
+                batches.append(batch)
+                batch, tokens = [], 0
+            batch.append((text, future))
+            tokens += cost
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _run(self):
+        unsent: List[Tuple[str, Future]] = []
+        try:
+            while True:
+                unsent = self._collect()
+                for batch in self._pack(unsent):
+                    with self._condition:
+                        self._in_flight += 1
+                    try:
+                        self._calls.submit(self._run_batch, batch)
+                    except BaseException:
+                        with self._condition:
+                            self._in_flight -= 1
+                        raise
+                    unsent = unsent[len(batch):]
+        except BaseException as e:
+            print(f"❌ Event batcher stopped: {e}")
+            # Fail everything queued so no caller waits forever; the next
+            # submit starts a new collector thread
+            with self._condition:
+                unsent, self._pending = unsent + self._pending, []
+                self._worker = None
+            _fail(unsent, e)
+
+    def _run_batch(self, batch: List[Tuple[str, Future]]):
+        try:
+            self._answer_batch(batch)
+        except BaseException as e:
+            print(f"❌ Event extraction of {len(batch)} articles failed: {e}")
+            _fail(batch, e)
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+
+    def _answer_batch(self, batch: List[Tuple[str, Future]]):
+        """``batch`` holds each article's "event" cache input (see event_cache_input)."""
+        if len(batch) == 1:
+            text, future = batch[0]
+            future.set_result(self._single(text))
+            return
+
+        ids = [str(i) for i in range(len(batch))]
+        payload = json.dumps(
+            [
+                {"id": i, "text": truncate_to_tokens(text, self.article_max_tokens)}
+                for i, (text, _) in zip(ids, batch)
+            ],
+            ensure_ascii=False,
+        )
+        try:
+            response = chat_completion(
+                "event_batch",
+                [
+                    {"role": "system", "content": "You are an AI assistant that follows instructions precisely."},
+                    {"role": "user", "content": BATCH_INSTRUCTION + payload},
+                ],
+                cache_input=payload,
+                max_tokens=EVENT_TOKENS_PER_ARTICLE * len(batch),
+                temperature=0 if LLM_CACHE_DETERMINISTIC else 0.7,
+                top_p=0.95,
+                response_format={"type": "json_object"},
+            )
+            events = parse_batch_response(response, ids)
+        except Exception as e:
+            print(f"⚠️ Batched event extraction of {len(batch)} articles failed, retrying one by one: {e}")
+            events = {}
+
+        with self._condition:
+            self.batches_run += 1
+            self.articles_sent += len(batch)
+            self.articles_batched += len(events)
+            self.fallbacks += len(batch) - len(events)
+
+        for article_id, (text, future) in zip(ids, batch):
+            if article_id in events:
+                future.set_result(events[article_id])
+                try:
+                    store_response("event", text, events[article_id], **EVENT_PARAMS)
+                except Exception as e:
+                    print(f"⚠️ Could not cache batched events: {e}")
+            else:
+                # Retried on their own call slots, in parallel
+                self._calls.submit(self._single, text).add_done_callback(
+                    lambda single, future=future: _copy_result(single, future)
+                )
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "mode": self.mode,
+                "queued_articles": len(self._pending),
+                "batches_run": self.batches_run,
+                "articles_batched": self.articles_batched,
+                "avg_batch_size": self.articles_sent / self.batches_run if self.batches_run else 0.0,
+                "single_calls": self.single_calls,
+                "fallbacks": self.fallbacks,
+                "cache_hits": self.cache_hits,
+            }
+
+
+def get_event_extraction_engine() -> EventExtractionEngine:
+    """Process-wide engine so concurrently processed articles share prompts."""
+    return get_resource("event_extraction_engine", EventExtractionEngine)
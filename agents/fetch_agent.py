@@ -1,53 +1,124 @@
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
 from langchain_core.runnables import RunnableLambda
-from sentence_transformers import SentenceTransformer, util
+import asyncio
+import numpy as np
+import operator
+import os
 import requests
-from typing import TypedDict, List, Optional
-
-from agents.fetchers.news_fetcher import fetch_news_topics
-from agents.insight_agent import generate_insights_for_topic
-from agents.openai_agent import create_story_from_news, extract_structured_events
-from storage.chroma_db import add_document, get_documents
-
-# Init services
-embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Annotated, Dict, TypedDict, List, Optional
+
+from agents.fetchers.article_fetcher import fetch_concurrently
+from agents.fetchers.news_fetcher import fetch_news_topics, find_candidate_articles, record_to_article
+from agents.insight_agent import (
+    extract_article_from_url,
+    find_stored_insights,
+    generate_insights_for_topic,
+    reusable_insight_id,
+)
+from agents.keyword_extractor import extract_keywords
+from agents.model_registry import get_embedding_model
+from agents.near_duplicates import BodyDeduplicator, cluster_by_headline
+from agents.openai_agent import create_story_from_news
+from agents.similarity import SIMILARITY_THRESHOLD, encode_texts, rank_by_similarity, rank_embeddings
+from storage.chroma_db import add_document_async, get_records, stable_document_id
+
+FILTER_TOP_K = 15
+# Articles downloaded and summarized at once, in either graph
+SUMMARIZE_CONCURRENCY = int(os.getenv("SUMMARIZE_CONCURRENCY", "4"))
 
 # Define State Schema
 class NewsState(TypedDict):
     user_input: str
+    run_id: Optional[str]
     keywords: List[str]
-    news_articles: Optional[List[dict]]
+    news_article_ids: Optional[List[str]]
     filtered_articles: Optional[List[dict]]
+    insight_ids: Optional[List[str]]
     summarised_news: Optional[List[dict]]
     stories: Optional[str]
+    story_id: Optional[str]
+    events: Optional[List[str]]
+    sources: Optional[List[dict]]
+    timings: Optional[Dict[str, float]]
+
+
+@dataclass
+class StoryResult:
+    """What fetch_story hands back: the story plus what it was built from."""
+    status: str
+    story: str = ""
+    events: List[str] = field(default_factory=list)
+    sources: List[dict] = field(default_factory=list)
+    # Seconds spent in each graph node, in execution order
+    timings: Dict[str, float] = field(default_factory=dict)
+    story_id: Optional[str] = None
+    run_id: Optional[str] = None
+    cached: bool = False
+    similarity: Optional[float] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def from_state(cls, state: NewsState) -> "StoryResult":
+        return cls(
+            status="success",
+            story=state.get("stories") or "",
+            events=state.get("events") or [],
+            sources=state.get("sources") or [],
+            timings=state.get("timings") or {},
+            story_id=state.get("story_id"),
+            run_id=state.get("run_id"),
+        )
+
+
+def timed_node(name: str, node):
+    """Wrap a node so the seconds it took are recorded under state["timings"][name]."""
+    def run(state: NewsState) -> NewsState:
+        start = time.perf_counter()
+        result = node(state)
+        timings = {**(state.get("timings") or {}), name: time.perf_counter() - start}
+        return {**result, "timings": timings}
+    return run
+
+
+def emit(event_type: str, **data):
+    """
+    Send a progress or token event to callers that stream the graph with
+    stream_mode="custom"; a no-op under plain invoke().
+    """
+    try:
+        get_stream_writer()({"type": event_type, **data})
+    except Exception:
+        pass
+
+
+def emit_progress(stage: str, message: str, **data):
+    emit("progress", stage=stage, message=message, **data)
 
 # --- NODE 1: Keyword Extractor ---
 def extract_keywords_node(state: NewsState) -> NewsState:
     print("***********Extracting Keywords Node***********")
     print(f"Extracting keywords from user input: {state['user_input']}")
-    keywords = extract_structured_events(state["user_input"])
-    return {**state, "keywords":  keywords}
+    keywords = extract_keywords(state["user_input"])
+    run_id = state.get("run_id") or uuid.uuid4().hex
+    emit_progress("keywords", f"Keywords found: {keywords}", keywords=keywords)
+    return {**state, "run_id": run_id, "keywords":  keywords}
 
 # --- NODE 2: News Fetcher ---
 def fetch_news_node(state: NewsState) -> NewsState:
     print("***********Fetching News Node***********")
     print(f'Fetching news articles for keywords: {state["keywords"]}')
 
-    fetch_news_topics(state["keywords"])
-
-    documents, metadatas = get_documents(category="news")
+    article_ids = fetch_news_topics(state["keywords"])
 
-    news_articles = []
-    for doc, meta in zip(documents[0], metadatas[0]):
-        news_articles.append({
-            "title": meta.get("title", "Untitled"),
-            "url": meta.get("url", ""),
-            "text": doc,
-            "source": meta.get("source", ""),
-        })
-
-    print(f"Fetched {len(news_articles)} news articles.")
-    return {**state, "news_articles": news_articles}
+    print(f"Fetched {len(article_ids)} news articles.")
+    emit_progress("fetch", f"Fetched {len(article_ids)} articles", count=len(article_ids))
+    return {**state, "news_article_ids": article_ids}
 
 # --- NODE 3: Title Matcher ---
 def filter_articles_node(state: NewsState) -> NewsState:
@@ -56,59 +127,141 @@ def filter_articles_node(state: NewsState) -> NewsState:
 
     try:
         query_keywords = state.get("keywords", [])
-        # Step 1: Split and clean keywords
+        # Step 1: Split and clean keywords (the LLM returns a comma-separated string)
+        if isinstance(query_keywords, str):
+            query_keywords = query_keywords.split(",")
         keywords = [kw.strip() for kw in query_keywords if isinstance(kw, str) and kw.strip()]
 
-        # Step 2: Encode all keyword embeddings
-        keyword_embeddings = embedding_model.encode(keywords, convert_to_tensor=True)
-
-        filtered = []
-
-        for article in state["news_articles"]:
-            title = article.get("title", "").strip()
-            if not title:
-                continue
-
-            # Step 3: Encode title
-            title_emb = embedding_model.encode(title, convert_to_tensor=True)
-
-            # Step 4: Compute cosine similarity with each keyword embedding
-            sims = util.cos_sim(title_emb, keyword_embeddings)
-            max_sim = sims.max().item()  # Best match among keywords
-
-            print(f"Max Similarity: {max_sim:.2f} | Title: {title}")
-
-            if max_sim >= 0.4:
-                filtered.append((max_sim, article))
-
-        # Step 5: Sort by similarity
-        filtered = sorted(filtered, reverse=True)[:15]
-        print(f"Filtered down to {len(filtered)} relevant articles based on title similarity.")
-
-        return {**state, "filtered_articles": [article for _, article in filtered]}
+        # Step 2: Nearest recent titles per keyword from Chroma's ANN index,
+        # falling back to this run's articles if the vector query fails
+        model = get_embedding_model()
+        keyword_embeddings = encode_texts(model, keywords)
+        try:
+            candidates = find_candidate_articles(keyword_embeddings)
+        except Exception as e:
+            print(f"⚠️ ANN candidate search failed, scoring fetched articles instead: {e}")
+            # Read back exactly the articles this run stored, by id
+            candidates = [
+                record_to_article(record)
+                for record in get_records(
+                    category="news", ids=state.get("news_article_ids") or [], include_embeddings=True
+                )
+            ]
+
+        articles = [a for a in candidates if a.get("title", "").strip()]
+        titles = [a["title"].strip() for a in articles]
+
+        # Step 3: Exact re-rank of the merged candidates with one matrix product,
+        # reusing the stored title vectors when every candidate has one
+        if articles and all(a.get("embedding") is not None for a in articles):
+            ranked = rank_embeddings(
+                keyword_embeddings,
+                np.array([a["embedding"] for a in articles], dtype=np.float32),
+                top_k=FILTER_TOP_K,
+                threshold=SIMILARITY_THRESHOLD,
+            )
+        else:
+            ranked = rank_by_similarity(
+                model,
+                keywords,
+                titles,
+                top_k=FILTER_TOP_K,
+                threshold=SIMILARITY_THRESHOLD,
+            )
+
+        for score, idx in ranked:
+            print(f"Max Similarity: {score:.2f} | Title: {titles[idx]}")
+
+        print(f"Filtered down to {len(ranked)} relevant articles based on title similarity.")
+        emit_progress("filter", f"{len(ranked)} relevant articles", count=len(ranked))
+
+        return {**state, "filtered_articles": [articles[idx] for _, idx in ranked]}
     
     except Exception as e:
         print(f"❌ Error during similarity filtering: {e}")
         return {**state, "filtered_articles": []}
 
 # --- NODE 4: Summarizer ---
-def summarize_node(state: NewsState) -> NewsState:
-    print("***********Summarizing Articles Node***********")
-    for article in state["filtered_articles"]:
-        generate_insights_for_topic(article["title"], [article["url"]])
-
-    documents, metadatas = get_documents(category="relevant_news")
-
+def plan_summaries(filtered_articles: List[dict]):
+    """
+    The articles that still need summarizing, keyed by URL, plus the fresh and
+    stale stored insights found for them (see find_stored_insights).
+    """
+    articles_by_url = {a["url"]: a for a in filtered_articles or [] if a.get("url")}
+
+    # Wire copies of one story are summarized once: near-duplicate headlines
+    # are dropped before download, near-duplicate bodies after it
+    representatives, same_headline = cluster_by_headline(list(articles_by_url.values()))
+    if same_headline:
+        print(f"Skipping {len(same_headline)} articles with near-duplicate headlines.")
+    articles_by_url = {a["url"]: a for a in representatives}
+
+    # Reuse insights already stored for these URLs; only new or changed articles
+    # go through download, summarization and event extraction
+    fresh, stale = find_stored_insights(list(articles_by_url))
+    print(f"Reusing {len(fresh)} fresh insights, processing {len(articles_by_url) - len(fresh)} articles.")
+    return articles_by_url, fresh, stale
+
+
+def load_insight_summaries(insight_ids: List[str]) -> List[dict]:
     stories = []
-    for doc, meta in zip(documents[0], metadatas[0]):
+    for record in get_records(category="news_insights", ids=insight_ids):
+        meta = record["metadata"]
         stories.append({
             "title": meta.get("title", ""),
             "urls": meta.get("urls", ""),
             "summary": meta.get("summaries", ""),
             "events": meta.get("events", ""),
         })
+    return stories
 
-    return {**state, "summarised_news": stories}
+def summarize_node(state: NewsState) -> NewsState:
+    print("***********Summarizing Articles Node***********")
+    articles_by_url, fresh, stale = plan_summaries(state["filtered_articles"])
+    insight_ids = list(fresh.values())
+    deduplicator = BodyDeduplicator()
+
+    # Downloads run concurrently; each article is summarized as soon as its body arrives.
+    # Articles are processed in parallel so their chunks share summarizer batches.
+    total = len(articles_by_url)
+    done = len(fresh)
+    emit_progress("summarize", f"Summarized {done} of {total} articles", done=done, total=total)
+
+    futures = {}
+    superseded = set()
+    rank = {url: i for i, url in enumerate(articles_by_url)}
+    to_fetch = [url for url in articles_by_url if url not in fresh]
+    with ThreadPoolExecutor(max_workers=SUMMARIZE_CONCURRENCY) as pool:
+        for url, text in fetch_concurrently(to_fetch, extract_article_from_url):
+            unchanged_id = reusable_insight_id(stale.get(url), text)
+            if unchanged_id:
+                insight_ids.append(unchanged_id)
+                done += 1
+                emit_progress("summarize", f"Summarized {done} of {total} articles", done=done, total=total)
+                continue
+            article = articles_by_url[url]
+            check = deduplicator.check(article, text, rank[url])
+            if not check.summarize:
+                if check.insight_id:
+                    insight_ids.append(check.insight_id)
+                done += 1
+                emit_progress("summarize", f"Summarized {done} of {total} articles", done=done, total=total)
+                continue
+            if check.replaces:
+                # Its summary is still produced (and stored), just not used in this story
+                superseded.add(check.replaces)
+            futures[url] = pool.submit(
+                generate_insights_for_topic, article["title"], [url],
+                article_texts={url: text}, run_id=state.get("run_id"),
+            )
+        for _ in as_completed(futures.values()):
+            done += 1
+            emit_progress("summarize", f"Summarized {done} of {total} articles", done=done, total=total)
+    insight_ids += [f.result() for url, f in futures.items() if url not in superseded and f.result()]
+    # A reused near-duplicate insight may also be one of this request's own
+    insight_ids = list(dict.fromkeys(insight_ids))
+
+    return {**state, "insight_ids": insight_ids, "summarised_news": load_insight_summaries(insight_ids)}
 
 # --- NODE 5: Story Generator ---
 def generate_story_node(state: NewsState) -> NewsState:
@@ -125,33 +278,44 @@ def generate_story_node(state: NewsState) -> NewsState:
     # Generate story using events
     print(f"Generating story from {len(events)} events.")
     print("Events:", events)
-    llm_response = create_story_from_news(events)
+    emit_progress("story", f"Writing a story from {len(events)} events", count=len(events))
+    llm_response = create_story_from_news(events, on_token=lambda text: emit("token", text=text))
 
-    try:
-        # Prepare metadata (ensure all values are strings)
-        event_str = "\n".join(events)
-        source_titles = ", ".join(
-            [a.get("title", "") for a in summarised_articles if a.get("title")]
-        )
-
-        add_document(
-            category="news_stories",
-            document=llm_response,
-        )
-    except Exception as e:
-        print(f"⚠️ Failed to store story: {e}")
+    sources = []
+    for article in summarised_articles:
+        for url in (article.get("urls") or "").split(","):
+            if url.strip():
+                sources.append({"title": article.get("title", ""), "url": url.strip()})
+
+    # Stored on a background thread so the answer is not held up by Chroma
+    story_id = None
+    if llm_response:
+        document = {
+            "title": "AI-generated story",
+            "events": events,
+            "story": llm_response,
+            "sources": [source["url"] for source in sources],
+        }
+        story_id = stable_document_id("news_stories", document)
+        add_document_async("news_stories", document, run_id=state.get("run_id"))
 
     print("Generated story:", llm_response)
-    return {**state, "stories": llm_response}
+    return {
+        **state,
+        "stories": llm_response,
+        "story_id": story_id,
+        "events": events,
+        "sources": sources,
+    }
 
 # --- Graph Construction ---
 graph = StateGraph(NewsState)
 
-graph.add_node("extract_keywords", RunnableLambda(extract_keywords_node))
-graph.add_node("fetch_news", RunnableLambda(fetch_news_node))
-graph.add_node("filter_articles", RunnableLambda(filter_articles_node))
-graph.add_node("summarize", RunnableLambda(summarize_node))
-graph.add_node("generate_story", RunnableLambda(generate_story_node))
+graph.add_node("extract_keywords", RunnableLambda(timed_node("extract_keywords", extract_keywords_node)))
+graph.add_node("fetch_news", RunnableLambda(timed_node("fetch_news", fetch_news_node)))
+graph.add_node("filter_articles", RunnableLambda(timed_node("filter_articles", filter_articles_node)))
+graph.add_node("summarize", RunnableLambda(timed_node("summarize", summarize_node)))
+graph.add_node("generate_story", RunnableLambda(timed_node("generate_story", generate_story_node)))
 
 graph.set_entry_point("extract_keywords")
 graph.add_edge("extract_keywords", "fetch_news")
@@ -164,4 +328,207 @@ news_chain = graph.compile()
 
 def get_news_chain_object():
     """Returns the compiled news processing chain."""
-    return news_chain
\ No newline at end of file
+    return news_chain
+
+
+# --- Async Graph ---
+# Same stages as news_chain, but summarize fans out into one branch per
+# article (at most SUMMARIZE_CONCURRENCY running at once) that join before
+# the story is written, so a request takes about as long as its slowest
+# article rather than the sum of them. Blocking model, HTTP and Chroma
+# calls run in worker threads.
+
+# A reducer update of {REPLACE: value} sets the key instead of merging into
+# it, so each run starts from scratch even when a checkpointer keeps the
+# previous run's state on the same thread
+REPLACE = "__replace__"
+
+
+def replaceable(merge):
+    def reducer(current, update):
+        if isinstance(update, dict) and REPLACE in update:
+            return update[REPLACE]
+        return merge(current, update)
+    return reducer
+
+
+extend_list = replaceable(lambda current, update: (current or []) + (update or []))
+merge_timings = replaceable(lambda current, update: {**(current or {}), **(update or {})})
+
+
+class AsyncNewsState(NewsState):
+    # Appended to by each article branch
+    insight_ids: Annotated[List[str], extend_list]
+    # Insights of articles replaced by a better-ranked near-duplicate
+    superseded_insight_ids: Annotated[List[str], extend_list]
+    timings: Annotated[Dict[str, float], merge_timings]
+    pending_articles: Optional[List[dict]]
+    summarize_started: Optional[float]
+
+
+class ArticleBatch:
+    """
+    Resources shared by one request's article branches. Kept out of graph
+    state (which must stay plain data for checkpointers and serializing
+    stream modes) in a registry keyed by run_id; see get_article_batch.
+    """
+
+    def __init__(self, total: Optional[int], done: int, stale: dict):
+        self.created_at = time.time()
+        self.total = total
+        self.done = done
+        self.stale = stale
+        self.deduplicator = BodyDeduplicator()
+        self.semaphore = asyncio.Semaphore(SUMMARIZE_CONCURRENCY)
+
+    def article_done(self):
+        self.done += 1
+        if self.total is None:
+            return
+        emit_progress("summarize", f"Summarized {self.done} of {self.total} articles", done=self.done, total=self.total)
+
+
+# run_id -> ArticleBatch of requests whose branches are running
+_article_batches: Dict[str, ArticleBatch] = {}
+# Batches of runs that failed before their join are dropped after this long
+ARTICLE_BATCH_MAX_AGE = 3600
+
+
+def register_article_batch(run_id: str, batch: ArticleBatch):
+    cutoff = time.time() - ARTICLE_BATCH_MAX_AGE
+    for stale_run in [key for key, value in _article_batches.items() if value.created_at < cutoff]:
+        _article_batches.pop(stale_run, None)
+    _article_batches[run_id] = batch
+
+
+def get_article_batch(run_id: str) -> ArticleBatch:
+    """
+    The run's batch. One that is gone (the run resumed from a checkpoint in
+    another process, or it outlived ARTICLE_BATCH_MAX_AGE) is recreated
+    empty: the remaining branches still share near-duplicate checks, but
+    stale insights are not reused and progress is not reported.
+    """
+    batch = _article_batches.get(run_id)
+    if batch is None:
+        print(f"⚠️ No article batch for run {run_id}, recreating it")
+        batch = _article_batches.setdefault(run_id, ArticleBatch(total=None, done=0, stale={}))
+    return batch
+
+
+def release_article_batch(run_id: str):
+    _article_batches.pop(run_id, None)
+
+
+def async_node(name: str, node, starts_run: bool = False):
+    """
+    Run a synchronous node in a worker thread and return only the keys it
+    changed, since list and timing keys are merged by reducers in AsyncNewsState.
+    The ``starts_run`` node also clears those keys from any previous run.
+    """
+    async def run(state: AsyncNewsState) -> dict:
+        start = time.perf_counter()
+        result = await asyncio.to_thread(node, state)
+        update = {key: value for key, value in result.items() if key not in state or state[key] is not value}
+        update.pop("insight_ids", None)
+        update.pop("superseded_insight_ids", None)
+        timings = {name: time.perf_counter() - start}
+        if starts_run:
+            update["insight_ids"] = {REPLACE: []}
+            update["superseded_insight_ids"] = {REPLACE: []}
+            timings = {REPLACE: timings}
+        update["timings"] = timings
+        return update
+    return run
+
+
+async def prepare_summaries_node(state: AsyncNewsState) -> dict:
+    print("***********Preparing Article Branches***********")
+    articles_by_url, fresh, stale = await asyncio.to_thread(plan_summaries, state.get("filtered_articles"))
+    batch = ArticleBatch(total=len(articles_by_url), done=len(fresh), stale=stale)
+    run_id = state.get("run_id") or uuid.uuid4().hex
+    register_article_batch(run_id, batch)
+    emit_progress("summarize", f"Summarized {batch.done} of {batch.total} articles", done=batch.done, total=batch.total)
+    return {
+        "insight_ids": list(fresh.values()),
+        "pending_articles": [
+            {"article": article, "rank": rank, "run_id": run_id}
+            for rank, (url, article) in enumerate(articles_by_url.items()) if url not in fresh
+        ],
+        "run_id": run_id,
+        "summarize_started": time.perf_counter(),
+    }
+
+
+def fan_out_articles(state: AsyncNewsState):
+    """One summarize_article branch per pending article, or straight to the join."""
+    pending = state.get("pending_articles") or []
+    if not pending:
+        return "collect_insights"
+    return [Send("summarize_article", branch) for branch in pending]
+
+
+async def summarize_article_node(branch: dict) -> dict:
+    """Download, deduplicate and summarize one article."""
+    article = branch["article"]
+    batch = get_article_batch(branch["run_id"])
+    url = article["url"]
+    insight_id, superseded = None, []
+    async with batch.semaphore:
+        try:
+            text = await asyncio.to_thread(extract_article_from_url, url)
+            insight_id = reusable_insight_id(batch.stale.get(url), text)
+            if not insight_id:
+                check = await asyncio.to_thread(batch.deduplicator.check, article, text, branch["rank"])
+                insight_id = check.insight_id
+                if check.replaces:
+                    superseded.append(stable_document_id("news_insights", {"urls": check.replaces}))
+                if check.summarize:
+                    insight_id = await asyncio.to_thread(
+                        generate_insights_for_topic, article["title"], [url],
+                        article_texts={url: text}, run_id=branch.get("run_id"),
+                    )
+        except Exception as e:
+            print(f"❌ Failed to summarize {url}: {e}")
+    batch.article_done()
+    return {"insight_ids": [insight_id] if insight_id else [], "superseded_insight_ids": superseded}
+
+
+async def collect_insights_node(state: AsyncNewsState) -> dict:
+    print("***********Collecting Article Branches***********")
+    release_article_batch(state.get("run_id"))
+    # A reused near-duplicate insight may also be one of this request's own
+    superseded = set(state.get("superseded_insight_ids") or [])
+    insight_ids = [i for i in dict.fromkeys(state.get("insight_ids") or []) if i not in superseded]
+    stories = await asyncio.to_thread(load_insight_summaries, insight_ids)
+    started = state.get("summarize_started") or time.perf_counter()
+    return {
+        "summarised_news": stories,
+        "pending_articles": None,
+        "timings": {"summarize": time.perf_counter() - started},
+    }
+
+
+async_graph = StateGraph(AsyncNewsState)
+
+async_graph.add_node("extract_keywords", RunnableLambda(async_node("extract_keywords", extract_keywords_node, starts_run=True)))
+async_graph.add_node("fetch_news", RunnableLambda(async_node("fetch_news", fetch_news_node)))
+async_graph.add_node("filter_articles", RunnableLambda(async_node("filter_articles", filter_articles_node)))
+async_graph.add_node("prepare_summaries", RunnableLambda(prepare_summaries_node))
+async_graph.add_node("summarize_article", RunnableLambda(summarize_article_node))
+async_graph.add_node("collect_insights", RunnableLambda(collect_insights_node))
+async_graph.add_node("generate_story", RunnableLambda(async_node("generate_story", generate_story_node)))
+
+async_graph.set_entry_point("extract_keywords")
+async_graph.add_edge("extract_keywords", "fetch_news")
+async_graph.add_edge("fetch_news", "filter_articles")
+async_graph.add_edge("filter_articles", "prepare_summaries")
+async_graph.add_conditional_edges("prepare_summaries", fan_out_articles, ["summarize_article", "collect_insights"])
+async_graph.add_edge("summarize_article", "collect_insights")
+async_graph.add_edge("collect_insights", "generate_story")
+async_graph.add_edge("generate_story", END)
+
+async_news_chain = async_graph.compile()
+
+def get_async_news_chain_object():
+    """Returns the compiled news chain with async nodes and per-article fan-out, for ainvoke / astream."""
+    return async_news_chain
@@ -0,0 +1,165 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Constants
+ARTICLE_FETCH_WORKERS = int(os.getenv("ARTICLE_FETCH_WORKERS", "8"))
+ARTICLE_PER_HOST_LIMIT = int(os.getenv("ARTICLE_PER_HOST_LIMIT", "2"))
+ARTICLE_FETCH_TIMEOUT = float(os.getenv("ARTICLE_FETCH_TIMEOUT", "10"))
+ARTICLE_FETCH_DEADLINE = float(os.getenv("ARTICLE_FETCH_DEADLINE", "20"))
+# Article pages are cut off after this many bytes of body
+ARTICLE_MAX_BYTES = int(os.getenv("ARTICLE_MAX_BYTES", str(2 * 1024 * 1024)))
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+T = TypeVar("T")
+
+_session = None
+_session_lock = threading.Lock()
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Process-wide session so connections to the same publisher are reused."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=ARTICLE_FETCH_WORKERS,
+                pool_maxsize=ARTICLE_FETCH_WORKERS,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+@contextmanager
+def host_slot(url: str):
+    """Hold one of the ARTICLE_PER_HOST_LIMIT connection slots for the url's host."""
+    host = urlparse(url).netloc.lower()
+    with _host_slots_lock:
+        slot = _host_slots.setdefault(
+            host, threading.BoundedSemaphore(ARTICLE_PER_HOST_LIMIT)
+        )
+    with slot:
+        yield
+
+
+def fetch_url(url: str, timeout: float = ARTICLE_FETCH_TIMEOUT) -> requests.Response:
+    with host_slot(url):
+        return get_http_session().get(url, timeout=timeout)
+
+
+@dataclass
+class HtmlPage:
+    body: bytes
+    # Declared charset, or None to let the parser sniff it
+    charset: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    not_modified: bool = False
+
+
+def fetch_page(
+    url: str,
+    timeout: float = ARTICLE_FETCH_TIMEOUT,
+    max_bytes: int = ARTICLE_MAX_BYTES,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> HtmlPage:
+    """
+    Download an HTML page, streaming at most ``max_bytes`` of the body.
+    With ``etag`` / ``last_modified`` from an earlier download this is a
+    conditional GET, and a 304 comes back as ``not_modified`` with no body.
+    Raises ValueError for responses that are not HTML, and requests'
+    HTTPError for error statuses.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    with host_slot(url):
+        with get_http_session().get(url, timeout=timeout, stream=True, headers=headers) as response:
+            if response.status_code == 304:
+                return HtmlPage(b"", None, etag, last_modified, not_modified=True)
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "")
+            mime = content_type.split(";")[0].strip().lower()
+            if mime and mime not in HTML_CONTENT_TYPES:
+                raise ValueError(f"not an HTML page ({mime})")
+
+            body = bytearray()
+            for block in response.iter_content(chunk_size=64 * 1024):
+                body.extend(block)
+                if len(body) >= max_bytes:
+                    print(f"✂️ {url} is larger than {max_bytes} bytes, truncating")
+                    del body[max_bytes:]
+                    break
+            # Only trust a declared charset; requests' ISO-8859-1 default is a guess
+            charset = response.encoding if "charset" in content_type.lower() else None
+            return HtmlPage(
+                bytes(body),
+                charset,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            )
+
+
+def fetch_html(
+    url: str,
+    timeout: float = ARTICLE_FETCH_TIMEOUT,
+    max_bytes: int = ARTICLE_MAX_BYTES,
+) -> Tuple[bytes, Optional[str]]:
+    """Unconditional fetch_page, as (body, declared charset or None)."""
+    page = fetch_page(url, timeout, max_bytes)
+    return page.body, page.charset
+
+
+def fetch_concurrently(
+    urls: Iterable[str],
+    worker: Callable[[str], T],
+    deadline: float = ARTICLE_FETCH_DEADLINE,
+    max_workers: int = ARTICLE_FETCH_WORKERS,
+) -> Iterator[Tuple[str, T]]:
+    """
+    Run ``worker(url)`` for every url on a thread pool and yield
+    ``(url, result)`` as each one finishes, so callers can start processing
+    the first article while the rest are still downloading.
+
+    Once ``deadline`` seconds have passed since the call, anything already
+    finished is still yielded and the stragglers are abandoned.
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(urls)))
+    futures = {executor.submit(worker, url): url for url in urls}
+    yielded = set()
+    try:
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                yielded.add(future)
+                yield futures[future], future.result()
+        except TimeoutError:
+            # Sweep up results that completed while the caller was busy
+            for future, url in futures.items():
+                if future not in yielded and future.done():
+                    yielded.add(future)
+                    yield url, future.result()
+
+            skipped = len(futures) - len(yielded)
+            print(f"⏱️ Fetch deadline of {deadline:g}s reached, skipping {skipped} slow URL(s).")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,74 @@
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class RateLimiter:
+    """
+    Per-provider limit: at most ``max_concurrent`` calls in flight and at
+    most ``per_second`` calls started per second (requests are spaced out
+    evenly rather than burst).
+    """
+
+    def __init__(self, max_concurrent: int, per_second: float):
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def limit(self):
+        with self._slots:
+            with self._lock:
+                now = time.monotonic()
+                start_at = max(now, self._next_start)
+                self._next_start = start_at + self._interval
+            if start_at > now:
+                time.sleep(start_at - now)
+            yield
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls: while a call for ``key`` is
+    running, other callers with the same key wait for its result instead of
+    issuing their own upstream request.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self) -> dict:
+        return {"upstream_calls": self.calls, "coalesced_calls": self.coalesced}
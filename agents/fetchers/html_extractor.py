@@ -0,0 +1,121 @@
+import os
+import re
+from typing import List, Optional
+
+import lxml.html
+
+# Paragraphs shorter than this are usually captions, bylines or buttons
+MIN_PARAGRAPH_WORDS = int(os.getenv("MIN_PARAGRAPH_WORDS", "6"))
+# Paragraphs whose text is mostly link text are navigation, not prose
+MAX_LINK_DENSITY = 0.5
+# A block matching a boilerplate class / id is kept when it holds more than
+# this share of the page's paragraph text
+MAX_BOILERPLATE_SHARE = 0.3
+
+BOILERPLATE_TAGS = (
+    "script", "style", "noscript", "template", "nav", "header", "footer",
+    "aside", "iframe", "svg", "button", "select",
+)
+# Words in class / id attributes that mark page chrome
+BOILERPLATE_TOKENS = {
+    "ad", "ads", "advert", "advertisement", "banner", "breadcrumb", "breadcrumbs",
+    "comment", "comments", "consent", "cookie", "cookies", "footer", "gdpr",
+    "menu", "modal", "nav", "navbar", "newsletter", "outbrain", "paywall",
+    "popup", "promo", "recommended", "related", "share", "sharing", "sidebar",
+    "social", "sponsored", "subscribe", "subscription", "taboola",
+}
+BOILERPLATE_ROLES = {"banner", "navigation", "contentinfo", "complementary", "dialog", "alert"}
+# Never dropped, even when their class matches (e.g. <body class="menu-open">)
+PROTECTED_TAGS = {"html", "body", "main", "article"}
+
+_TOKEN_SPLIT = re.compile(r"[^a-z0-9]+")
+
+
+def _is_boilerplate(element) -> bool:
+    if element.tag in PROTECTED_TAGS:
+        return False
+    if element.get("role", "").lower() in BOILERPLATE_ROLES:
+        return True
+    if element.get("aria-hidden") == "true":
+        return True
+    names = f"{element.get('class', '')} {element.get('id', '')}".lower()
+    return any(token in BOILERPLATE_TOKENS for token in _TOKEN_SPLIT.split(names))
+
+
+def _clean_text(element) -> str:
+    return " ".join(element.text_content().split())
+
+
+def _paragraphs(root) -> List[str]:
+    paragraphs = []
+    for p in root.iter("p"):
+        text = _clean_text(p)
+        if len(text.split()) < MIN_PARAGRAPH_WORDS:
+            continue
+        link_chars = sum(len(_clean_text(a)) for a in p.iter("a"))
+        if link_chars > MAX_LINK_DENSITY * len(text):
+            continue
+        paragraphs.append(text)
+    return paragraphs
+
+
+def _paragraph_chars(element) -> int:
+    return sum(len(_clean_text(p)) for p in element.iter("p"))
+
+
+def _parse(html: bytes, encoding: Optional[str]):
+    parser = lxml.html.HTMLParser(encoding=encoding, remove_comments=True, remove_pis=True)
+    return lxml.html.document_fromstring(html, parser=parser)
+
+
+def _drop(elements):
+    for element in elements:
+        if element.getparent() is not None:
+            element.drop_tree()
+
+
+def _extract(doc) -> str:
+    best = []
+    for tag in ("article", "main"):
+        for container in doc.iter(tag):
+            paragraphs = _paragraphs(container)
+            if sum(map(len, paragraphs)) > sum(map(len, best)):
+                best = paragraphs
+        if best:
+            break
+    if not best:
+        best = _paragraphs(doc)
+    return " ".join(best).strip()
+
+
+def html_to_text(html: bytes, encoding: Optional[str] = None) -> str:
+    """
+    Article body text from an HTML page, parsed with lxml.
+
+    Scripts, navigation, cookie banners, share bars, related-links blocks and
+    comments are removed first. Paragraphs are then taken from the largest
+    <article> (or <main>) when the page has one, skipping very short and
+    mostly-link paragraphs.
+    """
+    if not html:
+        return ""
+    doc = _parse(html, encoding)
+    _drop(list(doc.iter(*BOILERPLATE_TAGS)))
+
+    # Class / id matches are only trusted on small blocks: a wrapper such as
+    # <div class="page has-sidebar"> around the story holds most of its text
+    total_chars = _paragraph_chars(doc)
+    _drop([
+        el for el in doc.iter()
+        if isinstance(el.tag, str) and (el.get("class") or el.get("id") or el.get("role") or el.get("aria-hidden"))
+        and _is_boilerplate(el)
+        and _paragraph_chars(el) <= MAX_BOILERPLATE_SHARE * total_chars
+    ])
+    text = _extract(doc)
+    if text:
+        return text
+
+    # Attribute matching removed everything: fall back to tag-based removal only
+    doc = _parse(html, encoding)
+    _drop(list(doc.iter(*BOILERPLATE_TAGS)))
+    return _extract(doc)
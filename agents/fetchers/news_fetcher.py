@@ -1,12 +1,19 @@
 import os
+import time
 from datetime import datetime, timedelta
-from typing import List
-from dataclasses import dataclass
-import requests
+from typing import List, Optional
+from dataclasses import asdict, dataclass
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer, util
 
-from storage.chroma_db import add_document
+from agents.fetchers.article_fetcher import get_http_session
+from agents.fetchers.concurrency import RateLimiter, SingleFlight
+from agents.model_registry import get_embedding_model
+from agents.similarity import SIMILARITY_BATCH_SIZE, encode_texts, rank_by_similarity
+from storage.chroma_db import add_documents, query_by_embedding
+from storage.response_cache import ResponseCache, make_key
 
 # Setup
 load_dotenv()
@@ -16,9 +23,31 @@ NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 MEDIA_STACK_API_KEY = os.getenv("MEDIA_STACK_API_KEY")
 DEFAULT_COUNTRY = "us"
 SIMILARITY_TOP_K = 30
-
-# Load embedding model
-model = SentenceTransformer('all-MiniLM-L6-v2')
+CANDIDATES_PER_KEYWORD = int(os.getenv("CANDIDATES_PER_KEYWORD", "50"))
+CANDIDATE_RECENCY_HOURS = float(os.getenv("CANDIDATE_RECENCY_HOURS", "48"))
+PROVIDER_TIMEOUT = float(os.getenv("NEWS_PROVIDER_TIMEOUT", "10"))
+PROVIDER_WORKERS = int(os.getenv("NEWS_PROVIDER_WORKERS", "16"))
+HEDGE_AFTER_SECONDS = float(os.getenv("NEWS_HEDGE_AFTER_SECONDS", "2.5"))
+NEWS_CACHE_PATH = os.getenv("NEWS_CACHE_PATH", ".cache/news_responses.sqlite3")
+NEWS_CACHE_TTL = float(os.getenv("NEWS_CACHE_TTL", "900"))
+NEWS_CACHE_STALE_TTL = float(os.getenv("NEWS_CACHE_STALE_TTL", "3600"))
+
+# Per-provider limits: (max concurrent requests, max requests started per second)
+NEWSAPI_LIMITER = RateLimiter(
+    int(os.getenv("NEWSAPI_MAX_CONCURRENT", "4")), float(os.getenv("NEWSAPI_RATE_PER_SEC", "5"))
+)
+MEDIASTACK_LIMITER = RateLimiter(
+    int(os.getenv("MEDIASTACK_MAX_CONCURRENT", "2")), float(os.getenv("MEDIASTACK_RATE_PER_SEC", "2"))
+)
+
+# Identical queries from simultaneous users share one upstream call
+_in_flight = SingleFlight()
+_provider_pool = None
+_provider_pool_lock = threading.Lock()
+_response_cache = None
+_response_cache_lock = threading.Lock()
+_provider_counts = {}
+_provider_counts_lock = threading.Lock()
 
 
 @dataclass
@@ -28,11 +57,7 @@ class NewsArticle:
     url: str
 
 
-def fetch_from_mediastack(
-    keywords: str,
-    country: str = DEFAULT_COUNTRY
-) -> List[NewsArticle]:
-    """Fetch articles from MediaStack API."""
+def _query_mediastack(keywords: str, country: str) -> List[NewsArticle]:
     url = "https://api.mediastack.com/v1/news"
     params = {
         "access_key": MEDIA_STACK_API_KEY,
@@ -40,7 +65,8 @@ def fetch_from_mediastack(
         "countries": country,
     }
 
-    response = requests.get(url, params=params)
+    with MEDIASTACK_LIMITER.limit():
+        response = get_http_session().get(url, params=params, timeout=PROVIDER_TIMEOUT)
     if response.status_code != 200:
         print(f"MediaStack API error:{response.status_code} - {response.text}")
         return []
@@ -59,24 +85,26 @@ def fetch_from_mediastack(
     ]
 
 
-def fetch_from_newsapi(
-        keywords: str
-        ) -> List[NewsArticle]:
-    """Fetch articles from NewsAPI with date fallback."""
+def fetch_from_mediastack(
+    keywords: str,
+    country: str = DEFAULT_COUNTRY
+) -> List[NewsArticle]:
+    """Fetch articles from MediaStack API."""
+    key = ("mediastack", normalize_query(keywords), country)
+    return _cached_fetch(key, lambda: _query_mediastack(keywords, country))
 
-    dt_obj = datetime.now()
-    from_date = (dt_obj - timedelta(days=1)).strftime("%Y-%m-%d")
+
+def _query_newsapi(keywords: str, from_date: str, to_date: str) -> List[NewsArticle]:
     formatted_query = "+".join(keywords.split())
 
     search_in = "title,description,content"
     url = "https://newsapi.org/v2/everything"
     params = {
         "q": formatted_query,
-        "from": from_date,
         "apiKey": NEWS_API_KEY,
         "searchIn": search_in,
         "from": from_date,
-        "to": dt_obj.strftime("%Y-%m-%d"),
+        "to": to_date,
         "language": "en",
         "sortBy": "publishedAt",
         "pageSize": 20,
@@ -84,7 +112,8 @@ def fetch_from_newsapi(
     }
     
     print(f"Fetching articles from NewsAPI for keywords: {formatted_query}")
-    response = requests.get(url, params=params)
+    with NEWSAPI_LIMITER.limit():
+        response = get_http_session().get(url, params=params, timeout=PROVIDER_TIMEOUT)
     if response.status_code != 200:
         print(f"NewsAPI error: {response.status_code} - {response.text}")
         return []
@@ -101,67 +130,240 @@ def fetch_from_newsapi(
     ]
 
 
-def fetch_news_articles(keywords: str, date: str) -> List[NewsArticle]:
-    """Try MediaStack first, fallback to NewsAPI."""
-    articles = fetch_from_newsapi(keywords)
-    if articles:
-        return articles
-    return fetch_from_mediastack(keywords, date)
+def fetch_from_newsapi(
+        keywords: str
+        ) -> List[NewsArticle]:
+    """Fetch the last day of articles from NewsAPI."""
+    dt_obj = datetime.now()
+    from_date = (dt_obj - timedelta(days=1)).strftime("%Y-%m-%d")
+    to_date = dt_obj.strftime("%Y-%m-%d")
+
+    key = ("newsapi", normalize_query(keywords), from_date, to_date, "en")
+    return _cached_fetch(key, lambda: _query_newsapi(keywords, from_date, to_date))
+
+
+def normalize_query(keywords: str) -> str:
+    return " ".join(keywords.lower().split())
+
+
+def _get_response_cache() -> ResponseCache:
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(
+                NEWS_CACHE_PATH, ttl=NEWS_CACHE_TTL, stale_ttl=NEWS_CACHE_STALE_TTL
+            )
+        return _response_cache
+
+
+def _count_provider(provider: str, name: str):
+    with _provider_counts_lock:
+        counts = _provider_counts.setdefault(provider, {"lookups": 0, "upstream_calls": 0})
+        counts[name] += 1
+
+
+def _cached_fetch(key: tuple, query) -> List[NewsArticle]:
+    """
+    TTL cache in front of a provider call; misses go through request
+    coalescing. Empty results are not cached, since they are also what a
+    provider error or exhausted quota looks like.
+    """
+    provider = key[0]
+    _count_provider(provider, "lookups")
+
+    def upstream():
+        # Only the coalesced leader gets here; followers share its result
+        _count_provider(provider, "upstream_calls")
+        return query()
+
+    def fetch():
+        return [asdict(a) for a in _in_flight.do(key, upstream)]
+
+    rows = _get_response_cache().get_or_fetch(make_key(key), fetch, cacheable=bool)
+    return [NewsArticle(**row) for row in rows]
+
+
+def _safe_fetch(fetch, *args) -> List[NewsArticle]:
+    try:
+        return fetch(*args)
+    except Exception as e:
+        print(f"❌ {fetch.__name__} failed for {args[0]!r}: {e}")
+        return []
+
+
+def _get_provider_pool() -> ThreadPoolExecutor:
+    global _provider_pool
+    with _provider_pool_lock:
+        if _provider_pool is None:
+            _provider_pool = ThreadPoolExecutor(
+                max_workers=PROVIDER_WORKERS, thread_name_prefix="news-provider"
+            )
+        return _provider_pool
+
+
+def fetch_news_articles(
+        keywords: str,
+        date: str,
+        country: str = DEFAULT_COUNTRY,
+        hedge_after: float = HEDGE_AFTER_SECONDS,
+        ) -> List[NewsArticle]:
+    """
+    Try NewsAPI first, fall back to MediaStack. If NewsAPI has not answered
+    within ``hedge_after`` seconds, MediaStack is started alongside it and
+    the first non-empty result wins.
+    """
+    pool = _get_provider_pool()
+    primary = pool.submit(_safe_fetch, fetch_from_newsapi, keywords)
+    try:
+        articles = primary.result(timeout=hedge_after)
+        if articles:
+            return articles
+        return _safe_fetch(fetch_from_mediastack, keywords, country)
+    except FuturesTimeout:
+        print(f"⏱️ NewsAPI slower than {hedge_after:g}s for '{keywords}', hedging with MediaStack")
+
+    fallback = pool.submit(_safe_fetch, fetch_from_mediastack, keywords, country)
+    for future in as_completed([primary, fallback]):
+        articles = future.result()
+        if articles:
+            return articles
+    return []
 
 
 def filter_relevant_articles(
-        keywords: str, articles: List[NewsArticle]
+        keywords: str,
+        articles: List[NewsArticle],
+        threshold: Optional[float] = None,
+        batch_size: int = SIMILARITY_BATCH_SIZE,
         ) -> List[NewsArticle]:
     """Filter news articles using semantic similarity to the keyword."""
     print("Filtering articles using semantic similarity...")
 
-    query_embedding = model.encode(keywords, convert_to_tensor=True)
-    scored_articles = []
-
-    for article in articles:
-        combined_text = f"{article.title} {article.description}"
-        article_embedding = model.encode(combined_text, convert_to_tensor=True)
-        similarity = util.pytorch_cos_sim(
-            query_embedding, article_embedding
-        ).item()
-        scored_articles.append((similarity, article))
-
-    sorted_articles = sorted(scored_articles, key=lambda x: x[0], reverse=True)
-    top_articles = [
-        article
-        for _, article in sorted_articles[:SIMILARITY_TOP_K]
-    ]
+    combined_texts = [f"{a.title} {a.description}" for a in articles]
+    ranked = rank_by_similarity(
+        get_embedding_model(),
+        [keywords],
+        combined_texts,
+        top_k=SIMILARITY_TOP_K,
+        threshold=threshold,
+        batch_size=batch_size,
+    )
+
+    top_articles = [articles[idx] for _, idx in ranked]
     print(f"Selected top {len(top_articles)} relevant articles.")
     return top_articles
 
 
-def store_news_articles(articles: List[NewsArticle]):
+def record_to_article(record: dict) -> dict:
+    """Shape a news collection record the way the pipeline nodes expect."""
+    meta = record["metadata"]
+    return {
+        "id": record["id"],
+        "embedding": record.get("embedding"),
+        "title": meta.get("title", "Untitled"),
+        "description": meta.get("description", ""),
+        "url": meta.get("url", ""),
+        "text": record["document"],
+        "source": meta.get("source", ""),
+    }
+
+
+def find_candidate_articles(
+        keyword_embeddings,
+        per_keyword_k: int = CANDIDATES_PER_KEYWORD,
+        recency_hours: float = CANDIDATE_RECENCY_HOURS,
+        ) -> List[dict]:
+    """
+    Ask Chroma for the nearest recent titles to each keyword and merge the
+    hits, so only top-k candidates per keyword reach Python instead of the
+    whole news collection. Results carry their stored embedding for exact
+    re-ranking.
+    """
+    since = time.time() - recency_hours * 3600
+    matches = query_by_embedding(
+        "news",
+        keyword_embeddings,
+        n_results=per_keyword_k,
+        where={"inserted_at": {"$gte": since}},
+        include_embeddings=True,
+    )
+
+    candidates = {}
+    for rows in matches:
+        for row in rows:
+            candidates.setdefault(row["id"], record_to_article(row))
+    print(f"ANN search returned {len(candidates)} candidate articles for {len(matches)} keywords.")
+    return list(candidates.values())
+
+
+def store_news_articles(articles: List[NewsArticle]) -> List[str]:
+    """Upsert articles into the news collection in bulk and return their ids."""
+    if not articles:
+        return []
+    today = datetime.now().strftime('%Y-%m-%d')
+    documents = []
     for article in articles:
         document = article.__dict__.copy()
-        document["date_inserted"] = datetime.now().strftime('%Y-%m-%d')
+        document["date_inserted"] = today
+        documents.append(document)
 
-        add_document(category="news", document=document)
+    # Titles are what the news collection stores and what filtering compares,
+    # so embed them once here and hand the vectors to Chroma
+    embeddings = encode_texts(get_embedding_model(), [d.get("title") or "" for d in documents])
+    outcomes = add_documents(category="news", documents=documents, embeddings=embeddings)
+    for outcome in outcomes:
+        if outcome["status"] != "upserted":
+            print(f"⚠️ Failed to store article {outcome['id']}: {outcome['error']}")
+    return [o["id"] for o in outcomes if o["status"] == "upserted"]
 
 
-def get_news_for_topic(topic: str, date: str) -> List[NewsArticle]:
-    """Pipeline: fetch + filter news for a Google Trend topic."""
+def get_news_for_topic(topic: str, date: str) -> List[str]:
+    """Pipeline: fetch + store news for a topic, returning the stored ids."""
     print(f"Processing topic: {topic}")
     raw_articles = fetch_news_articles(topic, date)
-    store_news_articles(raw_articles)
+    return store_news_articles(raw_articles)
 
 
-def fetch_news_topics(news_topics):
+def fetch_news_topics(news_topics) -> List[str]:
+    """
+    Fetch news for every comma-separated topic concurrently, store all of it
+    in one bulk write and return the article ids.
+    """
     news_topics = [kw.strip() for kw in news_topics.split(",") if kw.strip()]
+    topics = list(dict.fromkeys(news_topics))
+    if not topics:
+        return []
 
-
-    topics = news_topics
     today = datetime.now().strftime("%Y-%m-%d")
-    for topic in topics:
-        try:
+    articles = []
+    with ThreadPoolExecutor(max_workers=len(topics)) as pool:
+        futures = {}
+        for topic in topics:
             print(f"Topic to fetch news from: {topic}")
-            get_news_for_topic(topic, today)
-        except Exception as e:
-            print(f"❌ Error fetching news for topic '{topic}': {e}")
-
-
-
+            futures[pool.submit(fetch_news_articles, topic, today)] = topic
+        for future in as_completed(futures):
+            topic = futures[future]
+            try:
+                articles.extend(future.result())
+            except Exception as e:
+                print(f"❌ Error fetching news for topic '{topic}': {e}")
+
+    article_ids = store_news_articles(articles)
+    return list(dict.fromkeys(article_ids))
+
+
+def provider_stats() -> dict:
+    """Cache hit ratio, coalescing and upstream quota saved per provider."""
+    with _provider_counts_lock:
+        providers = {
+            provider: {
+                **counts,
+                "quota_saved": counts["lookups"] - counts["upstream_calls"],
+            }
+            for provider, counts in _provider_counts.items()
+        }
+    return {
+        "cache": _get_response_cache().stats(),
+        "coalescing": _in_flight.stats(),
+        "providers": providers,
+    }
@@ -0,0 +1,64 @@
+"""
+CPU inference backends for the summarizer and the sentence embedder.
+
+- ``torch``: the stock fp32 PyTorch models
+- ``int8``:  PyTorch dynamic int8 quantization of every ``nn.Linear``
+- ``onnx``:  ONNX Runtime sessions (needs ``optimum[onnxruntime]`` for the
+  summarizer and ``sentence-transformers[onnx]`` for the embedder)
+"""
+import os
+
+SUMMARIZER_BACKEND = os.getenv("SUMMARIZER_BACKEND", "torch")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def _check_backend(backend: str):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend} (expected one of {BACKENDS})")
+
+
+def _quantize(model):
+    import torch
+
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_summarizer(model_name: str, backend: str = SUMMARIZER_BACKEND):
+    _check_backend(backend)
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+
+    if backend == "torch":
+        return pipeline("summarization", model=model_name)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if backend == "int8":
+        model = _quantize(AutoModelForSeq2SeqLM.from_pretrained(model_name).eval())
+    else:
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError as e:
+            raise ImportError(
+                "The onnx summarizer backend needs `pip install optimum[onnxruntime]`"
+            ) from e
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True)
+
+    return pipeline("summarization", model=model, tokenizer=tokenizer)
+
+
+def load_sentence_transformer(model_name: str, backend: str = EMBEDDING_BACKEND):
+    _check_backend(backend)
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx")
+
+    if backend == "int8":
+        # Quantized Linear layers only run on CPU
+        return _quantize(SentenceTransformer(model_name, device="cpu"))
+    return SentenceTransformer(model_name)
+
+
+def embedding_cache_name(model_name: str, backend: str = EMBEDDING_BACKEND) -> str:
+    """Vectors differ slightly per backend, so each gets its own cache."""
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
@@ -1,41 +1,109 @@
-import requests
-from bs4 import BeautifulSoup
-from transformers import pipeline
+import hashlib
+import os
 import re
-import nltk
-from agents.openai_agent import extract_structured_events
-from storage.chroma_db import add_document
-
-nltk.download("punkt")
-nltk.download("stopwords")
-nltk.download('punkt_tab')
+import time
 from nltk.tokenize import sent_tokenize
+from agents.fetchers.article_fetcher import fetch_page
+from agents.fetchers.html_extractor import html_to_text
+from agents.event_extraction import EVENT_RESULT_TIMEOUT, get_event_extraction_engine
+from agents.model_registry import ensure_nltk_data, get_summarizer_tokenizer
+from agents.summarization_engine import get_summarization_engine
+from storage.article_store import get_article_store
+from storage.chroma_db import add_document, get_records, stable_document_id, touch_documents_async
 
-summarizer = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6")
+# Stored insights younger than this are reused without re-downloading the article;
+# older ones are reused only if the article body has not changed
+INSIGHT_MAX_AGE_HOURS = float(os.getenv("INSIGHT_MAX_AGE_HOURS", "24"))
+# Stored article bodies younger than this are used without asking the publisher
+ARTICLE_STORE_FRESH_SECONDS = float(os.getenv("ARTICLE_STORE_FRESH_SECONDS", "600"))
+# Summarizer input chunks, in distilbart tokens (the model reads at most 1024)
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "512"))
+SUMMARY_CHUNK_OVERLAP = int(os.getenv("SUMMARY_CHUNK_OVERLAP", "32"))
+# Joined chunk summaries longer than this are summarized again (map-reduce)
+SUMMARY_TARGET_TOKENS = int(os.getenv("SUMMARY_TARGET_TOKENS", "300"))
+SUMMARY_MAX_REDUCE_ROUNDS = 2
 
 def extract_article_from_url(url):
+    """
+    Article body text for ``url``. Bodies are kept in the local article
+    store: recent ones are returned as-is, older ones are revalidated with a
+    conditional GET and reused on 304 (or when the publisher is unreachable).
+    """
     print(url)
+    store = get_article_store()
+    stored = store.get(url)
+    if stored is not None and stored.age <= ARTICLE_STORE_FRESH_SECONDS:
+        return stored.text
+
     try:
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.content, "html.parser")
-        paragraphs = soup.find_all("p")
-        text = " ".join([p.get_text() for p in paragraphs])
-        return text.strip()
+        if stored is not None:
+            page = fetch_page(url, etag=stored.etag, last_modified=stored.last_modified)
+        else:
+            page = fetch_page(url)
+        if page.not_modified:
+            store.mark_validated(url)
+            return stored.text
+
+        text = html_to_text(page.body, page.charset)
+        if text:
+            store.put(url, text, page.etag, page.last_modified)
+        return text
     except Exception as e:
         print(f"Failed to extract from {url}: {e}")
-        return ""
-
-def chunk_text(text, max_tokens=512):
-    sentences = sent_tokenize(text)
-    chunks, current_chunk = [], ""
-    for sentence in sentences:
-        if len((current_chunk + sentence).split()) <= max_tokens:
-            current_chunk += " " + sentence
+        return stored.text if stored is not None else ""
+
+def count_tokens(text):
+    return len(get_summarizer_tokenizer()(text, add_special_tokens=False)["input_ids"])
+
+
+def _split_long_sentence(tokenizer, sentence, budget):
+    """Cut a sentence longer than the budget at token boundaries."""
+    offsets = tokenizer(sentence, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+    pieces = []
+    for start in range(0, len(offsets), budget):
+        window = offsets[start:start + budget]
+        pieces.append((sentence[window[0][0]:window[-1][1]].strip(), len(window)))
+    return pieces
+
+
+def chunk_text(text, max_tokens=SUMMARY_CHUNK_TOKENS, overlap_tokens=SUMMARY_CHUNK_OVERLAP):
+    """
+    Split text into sentence-aligned chunks of at most ``max_tokens``
+    summarizer tokens, special tokens included. Each chunk repeats up to
+    ``overlap_tokens`` worth of the previous chunk's last sentences. All
+    sentences are tokenized in one batched call and packed in one pass.
+    """
+    ensure_nltk_data()
+    sentences = [sentence for sentence in sent_tokenize(text) if sentence.strip()]
+    if not sentences:
+        return []
+
+    tokenizer = get_summarizer_tokenizer()
+    budget = max_tokens - tokenizer.num_special_tokens_to_add()
+    lengths = [len(ids) for ids in tokenizer(sentences, add_special_tokens=False)["input_ids"]]
+
+    pieces = []
+    for sentence, length in zip(sentences, lengths):
+        if length > budget:
+            pieces.extend(_split_long_sentence(tokenizer, sentence, budget))
         else:
-            chunks.append(current_chunk.strip())
-            current_chunk = sentence
-    if current_chunk:
-        chunks.append(current_chunk.strip())
+            pieces.append((sentence, length))
+
+    chunks, current, current_tokens = [], [], 0
+    for piece, length in pieces:
+        if current and current_tokens + length > budget:
+            chunks.append(" ".join(p for p, _ in current))
+            # Carry trailing sentences over, as long as the new piece still fits
+            carried, carried_tokens = [], 0
+            for p, l in reversed(current):
+                if carried_tokens + l > overlap_tokens or carried_tokens + l + length > budget:
+                    break
+                carried.append((p, l))
+                carried_tokens += l
+            current, current_tokens = carried[::-1], carried_tokens
+        current.append((piece, length))
+        current_tokens += length
+    chunks.append(" ".join(p for p, _ in current))
     return chunks
 
 
@@ -51,22 +119,51 @@ def deduplicate_articles(articles):
 
 
 def summarize_article(article):
-    chunks = chunk_text(article)
-    summaries = [summarizer(chunk, max_length=130, min_length=30, do_sample=False)[0]["summary_text"] for chunk in chunks]
-    return " ".join(summaries)
+    return summarize_articles([article])[0]
+
+
+def summarize_articles(articles):
+    """
+    Summarize several articles at once so their chunks share batches.
+
+    Long articles are summarized map-reduce style: when the joined chunk
+    summaries are still longer than SUMMARY_TARGET_TOKENS, they are chunked
+    and summarized again, for up to SUMMARY_MAX_REDUCE_ROUNDS more rounds.
+    """
+    engine = get_summarization_engine()
+    texts = list(articles)
+    pending = list(range(len(texts)))
+    for _ in range(SUMMARY_MAX_REDUCE_ROUNDS + 1):
+        chunk_futures = {i: engine.submit(chunk_text(texts[i])) for i in pending}
+        for i, futures in chunk_futures.items():
+            texts[i] = " ".join(f.result() for f in futures)
+        pending = [
+            i for i in pending
+            if len(chunk_futures[i]) > 1 and count_tokens(texts[i]) > SUMMARY_TARGET_TOKENS
+        ]
+        if not pending:
+            break
+    return texts
 
 
-def build_insight_pipeline(url):
+def build_insight_pipeline(url, article_text=None):
     print(f"Building insight pipeline for URL: {url}")
-    raw_articles = [extract_article_from_url(url)]
+    if article_text is None:
+        article_text = extract_article_from_url(url)
+    raw_articles = [article_text]
 
     deduped_articles = deduplicate_articles(raw_articles)
     article_insights = []
 
-    for article in deduped_articles:
-        summary = summarize_article(article)
-        events = extract_structured_events(article)
-
+    # Event extraction (GPT-4o, batched across concurrent articles) overlaps summarization
+    event_futures = [get_event_extraction_engine().submit(article) for article in deduped_articles]
+    summaries = summarize_articles(deduped_articles)
+    for summary, events_future in zip(summaries, event_futures):
+        try:
+            events = events_future.result(timeout=EVENT_RESULT_TIMEOUT)
+        except Exception as e:
+            print(f"⚠️ No events for {url}: {e}")
+            events = ""
         article_insights.append({
             "url": url,
             "summary": summary,
@@ -76,7 +173,13 @@ def build_insight_pipeline(url):
     return article_insights
 
 
-def generate_insights_for_topic(topic, url_string):
+def generate_insights_for_topic(topic, url_string, article_texts=None, run_id=None):
+    """
+    Summarize and extract events for each URL and store them as one
+    news_insights document. ``article_texts`` maps URLs to bodies that were
+    already downloaded, so those URLs are not fetched again.
+    Returns the stored document id, or None on failure.
+    """
     try:
         print(f"🔍 Generating insights for topic: {topic}")
         if isinstance(url_string, list):
@@ -86,15 +189,18 @@ def generate_insights_for_topic(topic, url_string):
                 url_list = url_string  # already a list of URLs
         else:
             url_list = [url.strip() for url in url_string.split(",") if url.strip()]
+        article_texts = dict(article_texts or {})
+        for url in url_list:
+            if article_texts.get(url) is None:
+                article_texts[url] = extract_article_from_url(url)
         summaries = []
         events = []
 
         for url in url_list:
             try:
-                insights = build_insight_pipeline(url)
-                
-                summaries.append(insights["summary"])
-                events.append(insights["events"])
+                for insight in build_insight_pipeline(url, article_texts[url]):
+                    summaries.append(insight["summary"])
+                    events.append(insight["events"])
             except Exception as e:
                 print(f"⚠️ Failed to process URL {url}: {e}")
 
@@ -102,12 +208,68 @@ def generate_insights_for_topic(topic, url_string):
             "title": topic,
             "urls": ",".join(url_list),
             "summaries": "\n".join(summaries),
-            "events": "\n".join(summaries),
+            "events": "\n".join(events),
+            "content_hash": content_hash([article_texts[url] for url in url_list]),
         }
 
         print(f"📄 Document for '{topic}': {document}")
     
-        add_document(category="news_insights", document=document)
+        doc_id = add_document(category="news_insights", document=document, run_id=run_id)
         print(f"✅ Document for '{topic}' added successfully.")
+        return doc_id
     except Exception as e:
         print(f"❌ Failed to add document to 'relevant_news' collection: {e}")
+        return None
+
+
+def content_hash(texts):
+    digest = hashlib.sha1()
+    for text in texts:
+        digest.update((text or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _has_insight(record):
+    meta = record["metadata"]
+    return bool(meta.get("summaries") or meta.get("events"))
+
+
+def find_stored_insights(urls, max_age_hours=INSIGHT_MAX_AGE_HOURS):
+    """
+    Look up the single-URL insight records already stored for ``urls``.
+    Returns (fresh, stale): fresh maps URL -> insight id for records young
+    enough to reuse as-is; stale maps URL -> record for older ones, which
+    can still be reused if the article body is unchanged.
+    """
+    ids = {stable_document_id("news_insights", {"urls": url}): url for url in urls}
+    fresh, stale = {}, {}
+    try:
+        records = get_records(category="news_insights", ids=list(ids))
+    except Exception as e:
+        print(f"⚠️ Could not look up stored insights: {e}")
+        return fresh, stale
+
+    cutoff = time.time() - max_age_hours * 3600
+    for record in records:
+        if not _has_insight(record):
+            continue
+        url = ids[record["id"]]
+        if record["metadata"].get("inserted_at", 0) >= cutoff:
+            fresh[url] = record["id"]
+        else:
+            stale[url] = record
+    return fresh, stale
+
+
+def reusable_insight_id(record, article_text):
+    """
+    The stored insight id if it was built from this exact article body. The
+    record's inserted_at is refreshed so it counts as fresh again and the
+    article is not downloaded on every request once it passes
+    INSIGHT_MAX_AGE_HOURS.
+    """
+    if record and record["metadata"].get("content_hash") == content_hash([article_text]):
+        touch_documents_async("news_insights", [record["id"]])
+        return record["id"]
+    return None
@@ -0,0 +1,90 @@
+import os
+import threading
+from typing import List, Tuple
+
+from agents.model_registry import get_embedding_model, get_resource
+from agents.openai_agent import extract_structured_events
+from agents.similarity import encode_texts
+
+# "local": KeyBERT on the shared MiniLM encoder, GPT-4o only when unsure; "llm": always GPT-4o
+KEYWORD_EXTRACTOR = os.getenv("KEYWORD_EXTRACTOR", "local")
+# Below this query/keyword cosine similarity the local keywords are not trusted
+KEYWORD_MIN_CONFIDENCE = float(os.getenv("KEYWORD_MIN_CONFIDENCE", "0.5"))
+KEYWORD_TOP_N = int(os.getenv("KEYWORD_TOP_N", "5"))
+# Longer inputs are not queries; they keep going to the LLM
+KEYWORD_MAX_WORDS = 50
+
+_stats = {"local": 0, "llm_fallback": 0, "llm": 0}
+_stats_lock = threading.Lock()
+
+
+def _load_keyword_model():
+    from keybert import KeyBERT
+    from keybert.backend import BaseEmbedder
+
+    class SharedEncoderBackend(BaseEmbedder):
+        """Lets KeyBERT embed with the pipeline's cached MiniLM encoder."""
+
+        def __init__(self, encoder):
+            super().__init__(embedding_model=encoder)
+
+        def embed(self, documents, verbose=False):
+            return encode_texts(self.embedding_model, list(documents))
+
+    return KeyBERT(model=SharedEncoderBackend(get_embedding_model()))
+
+
+def get_keyword_model():
+    return get_resource("keyword_model", _load_keyword_model)
+
+
+def extract_keywords_local(text: str, top_n: int = KEYWORD_TOP_N) -> List[Tuple[str, float]]:
+    """
+    Keyphrases of up to three words from ``text``, with their cosine
+    similarity to the whole text, best first.
+    """
+    return get_keyword_model().extract_keywords(
+        text,
+        keyphrase_ngram_range=(1, 3),
+        stop_words="english",
+        top_n=top_n,
+        use_mmr=True,
+        diversity=0.5,
+    )
+
+
+def _count(path: str):
+    with _stats_lock:
+        _stats[path] += 1
+
+
+def extract_keywords(text: str) -> str:
+    """
+    Comma-separated search keywords for a user query, in the same format as
+    extract_structured_events' keyword mode. Short queries are handled
+    locally; the LLM is only called when the best local keyphrase scores
+    below KEYWORD_MIN_CONFIDENCE, or the input is not a short query.
+    """
+    if KEYWORD_EXTRACTOR != "local" or len(text.split()) >= KEYWORD_MAX_WORDS:
+        _count("llm")
+        return extract_structured_events(text)
+
+    try:
+        keywords = extract_keywords_local(text)
+    except Exception as e:
+        print(f"⚠️ Local keyword extraction failed, asking the LLM: {e}")
+        keywords = []
+
+    if keywords and keywords[0][1] >= KEYWORD_MIN_CONFIDENCE:
+        _count("local")
+        print(f"🔑 Local keywords: {keywords}")
+        return ", ".join(keyword for keyword, _ in keywords)
+
+    _count("llm_fallback")
+    return extract_structured_events(text)
+
+
+def keyword_stats() -> dict:
+    """How many queries were answered locally vs. by the LLM."""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable
+
+# Model names
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+SUMMARIZER_MODEL_NAME = os.getenv("SUMMARIZER_MODEL_NAME", "sshleifer/distilbart-cnn-12-6")
+NLTK_PACKAGES = {
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+    "stopwords": "corpora/stopwords",
+}
+
+_resources: Dict[str, object] = {}
+_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def get_resource(name: str, loader: Callable[[], object]):
+    """
+    Return the process-wide instance of a resource, building it with
+    ``loader`` on first use. Concurrent first callers wait on a per-resource
+    lock so the model is only ever loaded once.
+    """
+    if name in _resources:
+        return _resources[name]
+
+    with _registry_lock:
+        lock = _locks.setdefault(name, threading.Lock())
+
+    with lock:
+        if name not in _resources:
+            start = time.perf_counter()
+            _resources[name] = loader()
+            print(f"📦 Loaded {name} in {time.perf_counter() - start:.2f}s")
+    return _resources[name]
+
+
+def peek_resource(name: str):
+    """The resource if it has been built already, else None (never builds it)."""
+    return _resources.get(name)
+
+
+def _load_embedding_model():
+    # Heavy imports stay inside the loader so importing this module is cheap
+    from agents.inference_backends import embedding_cache_name, load_sentence_transformer
+    from storage.embedding_cache import CachedEncoder
+
+    return CachedEncoder(
+        load_sentence_transformer(EMBEDDING_MODEL_NAME),
+        embedding_cache_name(EMBEDDING_MODEL_NAME),
+    )
+
+
+def _load_summarizer():
+    from agents.inference_backends import load_summarizer
+
+    return load_summarizer(SUMMARIZER_MODEL_NAME)
+
+
+def _load_summarizer_tokenizer():
+    # Only the tokenizer, so chunking does not load the model when workers run it
+    from transformers import AutoTokenizer
+
+    return AutoTokenizer.from_pretrained(SUMMARIZER_MODEL_NAME)
+
+
+def _load_nltk_data():
+    import nltk
+
+    for package, path in NLTK_PACKAGES.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            nltk.download(package, quiet=True)
+    return True
+
+
+def get_embedding_model():
+    """Shared MiniLM encoder, reading through the embedding cache."""
+    return get_resource("embedding_model", _load_embedding_model)
+
+
+def get_summarizer():
+    """Shared distilbart summarization pipeline."""
+    return get_resource("summarizer", _load_summarizer)
+
+
+def get_summarizer_tokenizer():
+    """distilbart's tokenizer, for counting tokens the way the summarizer does."""
+    return get_resource("summarizer_tokenizer", _load_summarizer_tokenizer)
+
+
+def ensure_nltk_data():
+    """Download the NLTK tokenizer data once, only if it is missing."""
+    return get_resource("nltk_data", _load_nltk_data)
+
+
+WARM_UP_STEPS = {
+    "embedding_model": get_embedding_model,
+    "summarizer": get_summarizer,
+    "summarizer_tokenizer": get_summarizer_tokenizer,
+    "nltk_data": ensure_nltk_data,
+}
+
+
+def warm_up(names: Iterable[str] = tuple(WARM_UP_STEPS)):
+    """Eagerly load resources, e.g. once per worker before serving traffic."""
+    for name in names:
+        if name not in WARM_UP_STEPS:
+            raise ValueError(f"Unknown resource: {name}")
+        WARM_UP_STEPS[name]()
+
+
+def loaded_resources():
+    return sorted(_resources)
@@ -0,0 +1,119 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from agents.insight_agent import find_stored_insights
+from storage.minhash_index import MinHashIndex, get_corpus_index, minhash
+
+# Only the closest few corpus matches are checked for a reusable insight
+MAX_CORPUS_MATCHES = 3
+
+_stats = {"skipped_by_headline": 0, "skipped_by_body": 0, "reused_from_corpus": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cluster_by_headline(articles: List[dict]) -> Tuple[List[dict], Dict[str, str]]:
+    """
+    Group articles whose title + description are near-duplicates (wire
+    copies across outlets) before anything is downloaded. Returns the
+    cluster representatives, in input order so the best-ranked copy wins,
+    and a map from each skipped URL to its representative's URL.
+    """
+    index = MinHashIndex()
+    representatives, duplicate_of = [], {}
+    for article in articles:
+        signature = minhash(article.get("title", ""), article.get("description", ""))
+        if signature is not None:
+            matches = index.query(signature)
+            if matches:
+                duplicate_of[article["url"]] = matches[0][1]
+                _count("skipped_by_headline")
+                continue
+            index.add(article["url"], signature)
+        representatives.append(article)
+    return representatives, duplicate_of
+
+
+@dataclass
+class BodyCheck:
+    """Outcome of BodyDeduplicator.check; all None means "summarize it"."""
+    # Set when a better-ranked copy of this story is already being processed
+    duplicate_of: Optional[str] = None
+    # Set when a stored near-duplicate has a fresh insight to reuse
+    insight_id: Optional[str] = None
+    # Set when this article outranks the copy processed so far: summarize
+    # this one and drop that one's insight
+    replaces: Optional[str] = None
+
+    @property
+    def summarize(self) -> bool:
+        return self.duplicate_of is None and self.insight_id is None
+
+
+class BodyDeduplicator:
+    """
+    Near-duplicate check for downloaded articles, against the articles
+    already taken on in this request and the on-disk corpus index of
+    earlier requests' articles.
+
+    Articles are checked in download-completion order so nothing waits on a
+    slow publisher. Each story keeps its best-ranked copy: a better-ranked
+    duplicate arriving later replaces the copy processed so far.
+    """
+
+    def __init__(self):
+        self.request_index = MinHashIndex()
+        self.corpus_index = get_corpus_index()
+        # First URL indexed for a story -> (URL and filter rank of the copy kept)
+        self._kept: Dict[str, Tuple[str, int]] = {}
+        # Articles may be checked from several threads at once; a check and
+        # the add that follows it must not interleave with another article's
+        self._lock = threading.Lock()
+
+    def check(self, article: dict, text: str, rank: int) -> BodyCheck:
+        """``rank`` is the article's position in the filtered list (0 is best)."""
+        signature = minhash(article.get("title", ""), article.get("description", ""), text)
+        if signature is None:
+            return BodyCheck()
+        with self._lock:
+            return self._check(article["url"], signature, rank)
+
+    def _check(self, url: str, signature, rank: int) -> BodyCheck:
+        matches = self.request_index.query(signature)
+        if matches:
+            story = matches[0][1]
+            kept_url, kept_rank = self._kept[story]
+            _count("skipped_by_body")
+            if rank >= kept_rank:
+                return BodyCheck(duplicate_of=kept_url)
+            print(f"🔁 {url} outranks its near-duplicate {kept_url}, summarizing it instead")
+            self._kept[story] = (url, rank)
+            return BodyCheck(replaces=kept_url)
+
+        try:
+            corpus_matches = self.corpus_index.query(signature, exclude=[url])[:MAX_CORPUS_MATCHES]
+            if corpus_matches:
+                fresh, _ = find_stored_insights([match_url for _, match_url in corpus_matches])
+                for _, match_url in corpus_matches:
+                    if match_url in fresh:
+                        print(f"♻️ {url} is a near-duplicate of {match_url}, reusing its insight")
+                        _count("reused_from_corpus")
+                        return BodyCheck(insight_id=fresh[match_url])
+            self.corpus_index.add(url, signature)
+        except Exception as e:
+            print(f"⚠️ Near-duplicate corpus lookup failed: {e}")
+
+        self.request_index.add(url, signature)
+        self._kept[url] = (url, rank)
+        return BodyCheck()
+
+
+def near_duplicate_stats() -> dict:
+    """Articles not summarized because a near-duplicate was (or had been) processed."""
+    with _stats_lock:
+        return dict(_stats)
@@ -1,7 +1,10 @@
+import hashlib
 import os
+import threading
+import time
 from openai import AzureOpenAI
 
-from storage.chroma_db import add_document
+from storage.response_cache import ResponseCache, make_key
 
 # Configure Azure OpenAI client
 endpoint = os.getenv("ENDPOINT_URL", "https://youtubevideosstorygen.openai.azure.com/")
@@ -14,9 +17,206 @@ client = AzureOpenAI(
     api_version="2025-01-01-preview",
 )
 
+# Bump a version whenever its prompt changes so old cached answers are not reused
+PROMPT_VERSIONS = {"keyword": "v1", "event": "v1", "event_batch": "v1", "story": "v1"}
 
+# LLM response cache
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite3")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MODES = {m.strip() for m in os.getenv("LLM_CACHE_MODES", "keyword,event").split(",") if m.strip()}
+# Opt in to temperature 0 in cached modes so a cached answer is the answer
+LLM_CACHE_DETERMINISTIC = os.getenv("LLM_CACHE_DETERMINISTIC", "0") == "1"
 
-def create_story_from_news(events):
+# Article text sent for event extraction is cut to about this many tokens
+EVENT_ARTICLE_MAX_TOKENS = int(os.getenv("EVENT_ARTICLE_MAX_TOKENS", "1500"))
+# Texts shorter than this get the keyword prompt instead of event extraction
+EVENT_MIN_WORDS = 50
+# Sampling parameters of the single-article event prompt (part of its cache key)
+EVENT_PARAMS = {"max_tokens": 800, "temperature": 0.7, "top_p": 0.95, "frequency_penalty": 0, "presence_penalty": 0}
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+_llm_stats = {}
+_llm_stats_lock = threading.Lock()
+
+
+def _get_llm_cache() -> ResponseCache:
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = ResponseCache(
+                LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES
+            )
+        return _llm_cache
+
+
+def _record_call(mode, latency, usage=None, cache_hit=False):
+    with _llm_stats_lock:
+        stats = _llm_stats.setdefault(mode, {
+            "calls": 0, "cache_hits": 0, "latency_seconds": 0.0,
+            "prompt_tokens": 0, "completion_tokens": 0, "tokens_saved": 0,
+        })
+        stats["calls"] += 1
+        stats["latency_seconds"] += latency
+        usage = usage or {}
+        tokens = usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+        if cache_hit:
+            stats["cache_hits"] += 1
+            stats["tokens_saved"] += tokens
+        else:
+            stats["prompt_tokens"] += usage.get("prompt_tokens", 0)
+            stats["completion_tokens"] += usage.get("completion_tokens", 0)
+
+
+def llm_stats():
+    """Per-mode call count, cache hits, average latency and token usage/savings."""
+    with _llm_stats_lock:
+        return {
+            mode: {
+                **stats,
+                "avg_latency_ms": 1000 * stats["latency_seconds"] / stats["calls"] if stats["calls"] else 0.0,
+            }
+            for mode, stats in _llm_stats.items()
+        }
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough GPT token count (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to roughly ``max_tokens`` tokens, at a word boundary."""
+    limit = max_tokens * 4
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > 0 else limit]
+
+
+def normalize_input(text: str) -> str:
+    return " ".join(str(text).split())
+
+
+def _cache_key(mode: str, cache_input: str, params: dict):
+    """
+    Response cache key for ``mode``, or None when the mode is not cached.
+    Forces temperature 0 in ``params`` for cached modes (LLM_CACHE_DETERMINISTIC).
+    """
+    if mode not in LLM_CACHE_MODES or not _get_llm_cache().enabled:
+        return None
+    if LLM_CACHE_DETERMINISTIC:
+        params["temperature"] = 0
+    input_hash = hashlib.sha256(normalize_input(cache_input).encode("utf-8")).hexdigest()
+    return make_key([deployment, mode, PROMPT_VERSIONS[mode], input_hash, sorted(params.items())])
+
+
+def cached_response(mode: str, cache_input: str, **params):
+    """The cached answer chat_completion would return for these arguments, or None."""
+    start = time.perf_counter()
+    key = _cache_key(mode, cache_input, params)
+    if key is None:
+        return None
+    cached = _get_llm_cache().get_fresh(key)
+    if cached is None:
+        return None
+    _record_call(mode, time.perf_counter() - start, cached.get("usage"), cache_hit=True)
+    return cached["text"]
+
+
+def store_response(mode: str, cache_input: str, text: str, usage=None, **params):
+    """Cache ``text`` as chat_completion's answer for these arguments (e.g. a share of a batched answer)."""
+    key = _cache_key(mode, cache_input, params)
+    if key is not None and text:
+        _get_llm_cache().set(key, {"text": text, "usage": usage or {}})
+
+
+def chat_completion(mode: str, messages, cache_input: str, **params) -> str:
+    """
+    Run a chat completion for ``mode`` and return the message text.
+
+    Modes in LLM_CACHE_MODES are served from the persistent response cache,
+    keyed by deployment, prompt version, a hash of the normalized input and
+    the sampling parameters. Latency and token usage are recorded per mode.
+    """
+    start = time.perf_counter()
+    key = _cache_key(mode, cache_input, params)
+    if key is not None:
+        cached = _get_llm_cache().get_fresh(key)
+        if cached is not None:
+            _record_call(mode, time.perf_counter() - start, cached.get("usage"), cache_hit=True)
+            return cached["text"]
+
+    response = client.chat.completions.create(
+        model=deployment,
+        messages=messages,
+        stream=False,
+        **params,
+    )
+    text = response.choices[0].message.content.strip()
+    usage = {}
+    if getattr(response, "usage", None) is not None:
+        usage = {
+            "prompt_tokens": response.usage.prompt_tokens or 0,
+            "completion_tokens": response.usage.completion_tokens or 0,
+        }
+    _record_call(mode, time.perf_counter() - start, usage)
+
+    if key is not None and text:
+        _get_llm_cache().set(key, {"text": text, "usage": usage})
+    return text
+
+
+def chat_completion_stream(mode: str, messages, cache_input: str, **params):
+    """
+    Like chat_completion, but yields the answer as text deltas while the
+    model generates it. Shares chat_completion's cache entries: a cached
+    answer is yielded whole, and a streamed one is stored once complete.
+    """
+    start = time.perf_counter()
+    key = _cache_key(mode, cache_input, params)
+    if key is not None:
+        cached = _get_llm_cache().get_fresh(key)
+        if cached is not None:
+            _record_call(mode, time.perf_counter() - start, cached.get("usage"), cache_hit=True)
+            yield cached["text"]
+            return
+
+    usage = {}
+    parts = []
+    response = client.chat.completions.create(
+        model=deployment,
+        messages=messages,
+        stream=True,
+        stream_options={"include_usage": True},
+        **params,
+    )
+    try:
+        for chunk in response:
+            if getattr(chunk, "usage", None) is not None:
+                usage = {
+                    "prompt_tokens": chunk.usage.prompt_tokens or 0,
+                    "completion_tokens": chunk.usage.completion_tokens or 0,
+                }
+            # Azure sends a content-filter chunk with no choices first
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+    finally:
+        _record_call(mode, time.perf_counter() - start, usage)
+
+    text = "".join(parts).strip()
+    if key is not None and text:
+        _get_llm_cache().set(key, {"text": text, "usage": usage})
+
+
+def create_story_from_news(events, on_token=None):
+    """
+    Turn event lines into a short story (storing it is up to the caller).
+    With ``on_token`` set, the story is streamed and each text delta is
+    passed to it as it arrives.
+    """
 
     # Format story input
     story_input = "Here are recent news developments:\n\n"
@@ -38,32 +238,43 @@ def create_story_from_news(events):
     ]
 
     # Call Azure LLM
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=prompt,
-        temperature=0.7,
-        max_tokens=800
-    )
+    if on_token is None:
+        story = chat_completion(
+            "story",
+            prompt,
+            cache_input=story_input,
+            temperature=0.7,
+            max_tokens=800,
+        )
+    else:
+        parts = []
+        for delta in chat_completion_stream(
+            "story",
+            prompt,
+            cache_input=story_input,
+            temperature=0.7,
+            max_tokens=800,
+        ):
+            parts.append(delta)
+            on_token(delta)
+        story = "".join(parts).strip()
 
-    story = response.choices[0].message.content.strip()
+    return story
 
-    add_document(
-        category="news_stories",
-        document={
-            "title": "AI-generated story",
-            "events": events,
-            "story": story
-        }
-    )
+def is_event_text(text: str) -> bool:
+    """Long enough to extract events from; shorter texts get the keyword prompt."""
+    return len(text.strip().split()) >= EVENT_MIN_WORDS
+
+
+def event_cache_input(text: str) -> str:
+    """The (truncated) article text the "event" response cache is keyed on."""
+    return truncate_to_tokens(text, EVENT_ARTICLE_MAX_TOKENS)
 
-    return story
 
 def extract_structured_events(text: str) -> str:
     """Takes raw news text and returns extracted key events using Azure GPT-4o."""
     
-    # Thresholds — tweak as needed
-    word_count = len(text.strip().split())
-    mode = "keyword" if word_count < 50 else "event"
+    mode = "event" if is_event_text(text) else "keyword"
 
     if mode == "keyword":
         task_instruction = (
@@ -72,6 +283,8 @@ def extract_structured_events(text: str) -> str:
             f"Query: {text}"
         )
     else:
+        # Key events sit near the top of a news article; the tail only costs tokens
+        text = event_cache_input(text)
         task_instruction = (
             "Extract 3 to 5 key events from the following news article. Each event should follow this format:\n"
             "[Actor] performed [Action] on [Date] at [Location], due to [Reason].\n\n"
@@ -85,18 +298,7 @@ def extract_structured_events(text: str) -> str:
 
 
     try:
-        completion = client.chat.completions.create(
-            model=deployment,
-            messages=chat_prompt,
-            max_tokens=800,
-            temperature=0.7,
-            top_p=0.95,
-            frequency_penalty=0,
-            presence_penalty=0,
-            stream=False
-        )
-
-        return completion.choices[0].message.content.strip()
+        return chat_completion(mode, chat_prompt, cache_input=text, **EVENT_PARAMS)
     
     except Exception as e:
         print(f"❌ Error extracting structured events: {e}")
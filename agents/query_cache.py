@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from agents.model_registry import get_embedding_model, get_resource
+from agents.similarity import encode_texts
+from storage.chroma_db import add_document_async, get_records, query_by_embedding
+
+# Tunables
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+# Minimum cosine similarity between a new question and a cached one
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.8"))
+# Stories older than this are never served from the cache
+SEMANTIC_CACHE_MAX_AGE_HOURS = float(os.getenv("SEMANTIC_CACHE_MAX_AGE_HOURS", "6"))
+# Serve hits older than this, but regenerate the story in the background
+SEMANTIC_CACHE_REFRESH_AFTER = float(os.getenv("SEMANTIC_CACHE_REFRESH_AFTER", "3600"))
+SEMANTIC_CACHE_REFRESH = os.getenv("SEMANTIC_CACHE_REFRESH", "0") == "1"
+
+
+class SemanticQueryCache:
+    """
+    Answers near-duplicate questions ("Tesla AI news", "latest on Tesla's
+    AI") with a story generated for an earlier one.
+
+    Every answered question is stored in the ``story_queries`` collection
+    with its MiniLM embedding and the id of the story it produced. A lookup
+    is one ANN query over questions asked within the freshness window.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_age_hours: float = SEMANTIC_CACHE_MAX_AGE_HOURS,
+        refresh_after: Optional[float] = SEMANTIC_CACHE_REFRESH_AFTER if SEMANTIC_CACHE_REFRESH else None,
+    ):
+        self.threshold = threshold
+        self.max_age_hours = max_age_hours
+        self.refresh_after = refresh_after
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._pipeline_seconds = 0.0
+        self._pipeline_runs = 0
+        self._latency_saved = 0.0
+
+    def _embed(self, user_input: str):
+        return encode_texts(get_embedding_model(), [user_input.strip()])[0]
+
+    def lookup(self, user_input: str) -> Optional[dict]:
+        """
+        Return the cached answer for the closest recent question, or None.
+        The answer is a dict with the story record plus "similarity",
+        "matched_query" and "age" (seconds).
+        """
+        since = time.time() - self.max_age_hours * 3600
+        matches = query_by_embedding(
+            "story_queries",
+            [self._embed(user_input)],
+            n_results=1,
+            where={"inserted_at": {"$gte": since}},
+        )
+        best = matches[0][0] if matches and matches[0] else None
+        # Collections use cosine space, so distance = 1 - similarity
+        similarity = 1.0 - best["distance"] if best else 0.0
+        if best is None or similarity < self.threshold:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        stories = get_records("news_stories", ids=[best["metadata"].get("story_id", "")])
+        if not stories:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return {
+            **stories[0],
+            "similarity": similarity,
+            "matched_query": best["document"],
+            "age": time.time() - best["metadata"].get("inserted_at", since),
+        }
+
+    def remember(self, user_input: str, story_id: str):
+        """Map a question to the story it produced (written in the background)."""
+        add_document_async("story_queries", {"query": user_input.strip(), "story_id": story_id})
+
+    def record_pipeline(self, seconds: float):
+        """Time of a full (uncached) pipeline run, the baseline for latency saved."""
+        with self._lock:
+            self._pipeline_seconds += seconds
+            self._pipeline_runs += 1
+
+    def record_hit(self, seconds: float):
+        with self._lock:
+            if self._pipeline_runs:
+                average = self._pipeline_seconds / self._pipeline_runs
+                self._latency_saved += max(0.0, average - seconds)
+
+    def needs_refresh(self, hit: dict) -> bool:
+        return self.refresh_after is not None and hit["age"] > self.refresh_after
+
+    def refresh_in_background(self, key: str, refresh: Callable[[], None]):
+        """Run ``refresh`` on a daemon thread, at most once at a time per key."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self.refreshes += 1
+
+        def run():
+            try:
+                refresh()
+            except Exception as e:
+                print(f"⚠️ Background story refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name="story-refresh", daemon=True).start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "lookups": lookups,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "refreshes": self.refreshes,
+                "avg_pipeline_seconds": (
+                    self._pipeline_seconds / self._pipeline_runs if self._pipeline_runs else 0.0
+                ),
+                "latency_saved_seconds": self._latency_saved,
+            }
+
+
+def get_query_cache() -> SemanticQueryCache:
+    return get_resource("query_cache", SemanticQueryCache)
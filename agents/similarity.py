@@ -0,0 +1,86 @@
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Tunables
+SIMILARITY_BATCH_SIZE = int(os.getenv("SIMILARITY_BATCH_SIZE", "64"))
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.4"))
+
+
+def encode_texts(
+    model, texts: Sequence[str], batch_size: int = SIMILARITY_BATCH_SIZE
+) -> np.ndarray:
+    """Encode all texts in one batched call as L2-normalised float32 rows."""
+    if not texts:
+        dim = model.get_sentence_embedding_dimension() or 0
+        return np.zeros((0, dim), dtype=np.float32)
+
+    embeddings = model.encode(
+        list(texts),
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def select_top_k(
+    scores: np.ndarray,
+    top_k: Optional[int] = None,
+    threshold: Optional[float] = None,
+) -> List[Tuple[float, int]]:
+    """Return (score, index) pairs above threshold, best first, capped at top_k."""
+    if threshold is None:
+        candidates = np.arange(len(scores))
+    else:
+        candidates = np.flatnonzero(scores >= threshold)
+
+    if top_k is not None and len(candidates) > top_k:
+        best = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+        candidates = candidates[best]
+
+    ordered = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return [(float(scores[i]), int(i)) for i in ordered]
+
+
+def rank_embeddings(
+    query_embeddings: np.ndarray,
+    candidate_embeddings: np.ndarray,
+    top_k: Optional[int] = None,
+    threshold: Optional[float] = SIMILARITY_THRESHOLD,
+) -> List[Tuple[float, int]]:
+    """Like rank_by_similarity, for vectors that were already computed (e.g. read from Chroma)."""
+    if not len(query_embeddings) or not len(candidate_embeddings):
+        return []
+
+    queries = _normalise(np.asarray(query_embeddings, dtype=np.float32))
+    candidates = _normalise(np.asarray(candidate_embeddings, dtype=np.float32))
+    scores = (candidates @ queries.T).max(axis=1)
+    return select_top_k(scores, top_k, threshold)
+
+
+def _normalise(embeddings: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.clip(norms, 1e-12, None)
+
+
+def rank_by_similarity(
+    model,
+    queries: Sequence[str],
+    candidates: Sequence[str],
+    top_k: Optional[int] = None,
+    threshold: Optional[float] = SIMILARITY_THRESHOLD,
+    batch_size: int = SIMILARITY_BATCH_SIZE,
+) -> List[Tuple[float, int]]:
+    """
+    Score every candidate against every query with a single matrix product
+    and keep the best match per candidate.
+    """
+    if not queries or not candidates:
+        return []
+
+    query_embeddings = encode_texts(model, queries, batch_size)
+    candidate_embeddings = encode_texts(model, candidates, batch_size)
+    return rank_embeddings(query_embeddings, candidate_embeddings, top_k, threshold)
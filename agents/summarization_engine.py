@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from agents.model_registry import get_resource, get_summarizer, peek_resource
+from agents.summarization_pool import get_summarization_pool
+
+# Tunables
+SUMMARY_MAX_BATCH_SIZE = int(os.getenv("SUMMARY_MAX_BATCH_SIZE", "8"))
+SUMMARY_MAX_WAIT_MS = float(os.getenv("SUMMARY_MAX_WAIT_MS", "25"))
+SUMMARY_MAX_LENGTH = 130
+SUMMARY_MIN_LENGTH = 30
+
+
+def run_summarizer(summarizer, texts: Sequence[str]) -> List[str]:
+    """Summarize one batch of texts; shared by the in-process and pooled backends."""
+    outputs = summarizer(
+        list(texts),
+        max_length=SUMMARY_MAX_LENGTH,
+        min_length=SUMMARY_MIN_LENGTH,
+        do_sample=False,
+        truncation=True,
+        batch_size=len(texts),
+    )
+    return [output["summary_text"] for output in outputs]
+
+
+class SummarizationEngine:
+    """
+    Micro-batcher in front of the summarization pipeline.
+
+    Callers submit chunks from any thread and get futures back. A single
+    worker thread collects whatever arrives within ``max_wait_ms`` (or until
+    ``max_batch_size`` chunks are pending), sorts the chunks by length so
+    each batch pads as little as possible, runs the batches through the
+    pipeline and resolves each chunk's future with its summary.
+
+    With a ``pool`` the batches are handed to the worker processes instead
+    of running in this process, and the worker thread moves straight on to
+    the next batch.
+    """
+
+    def __init__(
+        self,
+        summarizer_factory: Callable = get_summarizer,
+        max_batch_size: int = SUMMARY_MAX_BATCH_SIZE,
+        max_wait_ms: float = SUMMARY_MAX_WAIT_MS,
+        pool=None,
+    ):
+        self.summarizer_factory = summarizer_factory
+        self.pool = pool
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches_run = 0
+        self.chunks_summarized = 0
+
+        self._pending: List[Tuple[str, Future]] = []
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name="summarization-engine", daemon=True
+            )
+            self._worker.start()
+
+    def submit(self, chunks: Sequence[str]) -> List[Future]:
+        """Queue chunks for summarization; returns one future per chunk."""
+        futures = [Future() for _ in chunks]
+        with self._condition:
+            self._pending.extend(zip(chunks, futures))
+            self._ensure_worker()
+            self._condition.notify()
+        return futures
+
+    def summarize(self, chunks: Sequence[str]) -> List[str]:
+        return [future.result() for future in self.submit(chunks)]
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+
+            # Give concurrent callers a short window to add to this batch
+            deadline = time.monotonic() + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            pending, self._pending = self._pending, []
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            # Length buckets: neighbours in sorted order have similar lengths
+            pending.sort(key=lambda item: len(item[0].split()))
+            for start in range(0, len(pending), self.max_batch_size):
+                self._run_batch(pending[start:start + self.max_batch_size])
+
+    def _run_batch(self, batch: List[Tuple[str, Future]]):
+        texts = [text for text, _ in batch]
+        if self.pool is not None:
+            try:
+                pooled = self.pool.submit(texts)
+            except Exception as e:
+                self._fail(batch, e)
+                return
+            pooled.add_done_callback(lambda done: self._resolve_pooled(batch, done))
+            return
+
+        try:
+            self._resolve(batch, run_summarizer(self.summarizer_factory(), texts))
+        except Exception as e:
+            self._fail(batch, e)
+
+    def _resolve_pooled(self, batch: List[Tuple[str, Future]], pooled: Future):
+        error = pooled.exception()
+        if error is not None:
+            self._fail(batch, error)
+        else:
+            self._resolve(batch, pooled.result())
+
+    def _resolve(self, batch: List[Tuple[str, Future]], summaries: List[str]):
+        for (_, future), summary in zip(batch, summaries):
+            future.set_result(summary)
+        with self._condition:
+            self.batches_run += 1
+            self.chunks_summarized += len(batch)
+
+    def _fail(self, batch: List[Tuple[str, Future]], error: BaseException):
+        print(f"❌ Summarization batch of {len(batch)} failed: {error}")
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def stats(self) -> dict:
+        with self._condition:
+            queued = len(self._pending)
+        stats = {
+            "queued_chunks": queued,
+            "batches_run": self.batches_run,
+            "chunks_summarized": self.chunks_summarized,
+            "avg_batch_size": (
+                self.chunks_summarized / self.batches_run if self.batches_run else 0.0
+            ),
+        }
+        if self.pool is not None:
+            stats["pool"] = self.pool.stats()
+        return stats
+
+
+def get_summarization_engine() -> SummarizationEngine:
+    """Process-wide engine so concurrent requests share batches."""
+    return get_resource(
+        "summarization_engine",
+        lambda: SummarizationEngine(pool=get_summarization_pool()),
+    )
+
+
+def summarization_stats() -> dict:
+    """Engine stats, zeroed if no request has started the engine (and its worker pool) yet."""
+    engine = peek_resource("summarization_engine")
+    if engine is None:
+        return {"queued_chunks": 0, "batches_run": 0, "chunks_summarized": 0, "avg_batch_size": 0.0}
+    return engine.stats()
@@ -0,0 +1,202 @@
+import atexit
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Optional, Sequence
+
+from agents.model_registry import get_resource
+
+# 0 keeps summarization in-process; N > 0 starts N worker processes
+SUMMARIZATION_WORKERS = int(os.getenv("SUMMARIZATION_WORKERS", "0"))
+SUMMARIZATION_THREADS_PER_WORKER = int(os.getenv("SUMMARIZATION_THREADS_PER_WORKER", "0"))
+
+
+def _worker_main(worker_id: int, tasks, results, torch_threads: int):
+    """Worker process: load distilbart once, then summarize batches off the task queue."""
+    try:
+        import torch
+
+        # One intra-op thread pool per worker would oversubscribe the cores
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    from agents.model_registry import get_summarizer
+    from agents.summarization_engine import run_summarizer
+
+    summarizer = get_summarizer()
+    results.put(("ready", worker_id, None, None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, texts = task
+        results.put(("start", worker_id, task_id, None))
+        start = time.perf_counter()
+        try:
+            outcome = ("ok", run_summarizer(summarizer, texts))
+        except Exception as e:
+            outcome = ("error", f"{type(e).__name__}: {e}")
+        results.put(("done", worker_id, task_id, (outcome, time.perf_counter() - start)))
+
+
+class SummarizationPool:
+    """
+    Pool of summarizer processes fed through a multiprocessing queue.
+
+    ``submit`` returns a future per batch of texts; a collector thread in the
+    parent resolves futures as workers report back and keeps the per-worker
+    busy time used for the utilization metrics.
+    """
+
+    def __init__(self, num_workers: int = SUMMARIZATION_WORKERS, torch_threads: int = SUMMARIZATION_THREADS_PER_WORKER):
+        num_workers = max(1, num_workers)
+        if torch_threads <= 0:
+            torch_threads = max(1, (os.cpu_count() or 1) // num_workers)
+
+        # spawn, so workers do not inherit the parent's torch/thread state
+        ctx = mp.get_context("spawn")
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._futures: Dict[int, Future] = {}
+        self._task_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._closed = False
+        self.tasks_completed = 0
+        self.tasks_failed = 0
+
+        self._workers = {
+            worker_id: {
+                "process": ctx.Process(
+                    target=_worker_main,
+                    args=(worker_id, self._tasks, self._results, torch_threads),
+                    name=f"summarizer-{worker_id}",
+                    daemon=True,
+                ),
+                "ready": False,
+                "current_task": None,
+                "busy_seconds": 0.0,
+                "tasks": 0,
+            }
+            for worker_id in range(num_workers)
+        }
+        for worker in self._workers.values():
+            worker["process"].start()
+
+        self._collector = threading.Thread(
+            target=self._collect_results, name="summarization-pool-collector", daemon=True
+        )
+        self._collector.start()
+        atexit.register(self.shutdown)
+        print(f"🧵 Started summarization pool with {num_workers} workers x {torch_threads} threads")
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Summarization pool is shut down")
+            task_id = next(self._task_ids)
+            self._futures[task_id] = future
+        self._tasks.put((task_id, list(texts)))
+        return future
+
+    def _collect_results(self):
+        while True:
+            try:
+                kind, worker_id, task_id, payload = self._results.get(timeout=1)
+            except queue.Empty:
+                if self._closed:
+                    return
+                self._check_workers()
+                continue
+            except (EOFError, OSError):
+                return
+
+            with self._lock:
+                worker = self._workers[worker_id]
+                if kind == "ready":
+                    worker["ready"] = True
+                    continue
+                if kind == "start":
+                    worker["current_task"] = task_id
+                    continue
+
+                (status, result), elapsed = payload
+                worker["current_task"] = None
+                worker["busy_seconds"] += elapsed
+                worker["tasks"] += 1
+                future = self._futures.pop(task_id, None)
+                if status == "ok":
+                    self.tasks_completed += 1
+                else:
+                    self.tasks_failed += 1
+
+            if future is not None:
+                if status == "ok":
+                    future.set_result(result)
+                else:
+                    future.set_exception(RuntimeError(result))
+
+    def _check_workers(self):
+        """Fail tasks held by crashed workers instead of hanging their callers."""
+        failed = []
+        with self._lock:
+            for worker_id, worker in self._workers.items():
+                task_id = worker["current_task"]
+                if task_id is None or worker["process"].is_alive():
+                    continue
+                worker["current_task"] = None
+                failed.append((task_id, f"Summarization worker {worker_id} exited"))
+
+            # Nobody is left to drain the queue, so everything still queued fails too
+            if not any(w["process"].is_alive() for w in self._workers.values()):
+                failed.extend((task_id, "All summarization workers exited") for task_id in list(self._futures))
+
+            futures = [(self._futures.pop(task_id, None), reason) for task_id, reason in failed]
+            self.tasks_failed += sum(1 for future, _ in futures if future is not None)
+
+        for future, reason in futures:
+            if future is not None:
+                future.set_exception(RuntimeError(reason))
+
+    def stats(self) -> dict:
+        with self._lock:
+            uptime = time.monotonic() - self._started_at
+            busy = sum(1 for w in self._workers.values() if w["current_task"] is not None)
+            in_flight = len(self._futures)
+            return {
+                "workers": len(self._workers),
+                "workers_ready": sum(1 for w in self._workers.values() if w["ready"]),
+                "queue_depth": in_flight - busy,
+                "in_flight": in_flight,
+                "tasks_completed": self.tasks_completed,
+                "tasks_failed": self.tasks_failed,
+                "worker_utilization": {
+                    worker_id: round(w["busy_seconds"] / uptime, 3) if uptime else 0.0
+                    for worker_id, w in self._workers.items()
+                },
+                "worker_tasks": {worker_id: w["tasks"] for worker_id, w in self._workers.items()},
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers.values():
+            worker["process"].join(timeout=5)
+
+
+def get_summarization_pool() -> Optional[SummarizationPool]:
+    """The process-wide pool, or None when SUMMARIZATION_WORKERS is 0."""
+    if SUMMARIZATION_WORKERS <= 0:
+        return None
+    return get_resource("summarization_pool", SummarizationPool)
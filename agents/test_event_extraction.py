@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+
+import pytest
+
+from agents import event_extraction
+from agents.event_extraction import EventExtractionEngine, parse_batch_response
+
+ARTICLE = " ".join(["word"] * 60)
+
+
+def test_parse_batch_response():
+    response = json.dumps({"articles": [
+        {"id": "0", "events": ["First event.", "  ", "Second event."]},
+        {"id": 1, "events": "Joined\nlines"},
+        {"id": "2", "events": []},
+        {"id": "9", "events": ["Unknown id."]},
+    ]})
+    assert parse_batch_response(response, ["0", "1", "2"]) == {
+        "0": "First event.\nSecond event.",
+        "1": "Joined\nlines",
+    }
+    assert parse_batch_response("{}", ["0"]) == {}
+    with pytest.raises(json.JSONDecodeError):
+        parse_batch_response("not json", ["0"])
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Stand-ins for the model calls; records the single-article calls in flight."""
+    calls = {"batch": [], "active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def single(text):
+        with lock:
+            calls["active"] += 1
+            calls["peak"] = max(calls["peak"], calls["active"])
+        time.sleep(0.2)
+        with lock:
+            calls["active"] -= 1
+        return f"events of {text.split()[0]}"
+
+    monkeypatch.setattr(event_extraction, "extract_structured_events", single)
+    monkeypatch.setattr(event_extraction, "cached_response", lambda *args, **kwargs: None)
+    monkeypatch.setattr(event_extraction, "store_response", lambda *args, **kwargs: None)
+    monkeypatch.setattr(event_extraction, "chat_completion", lambda *args, **kwargs: calls["batch"].pop(0))
+    return calls
+
+
+def _submit_together(engine, count):
+    # Queued before the collector looks, so they are not sent one by one
+    with engine._condition:
+        return [engine.submit(f"a{i} {ARTICLE}") for i in range(count)]
+
+
+def test_batched_answer_and_missing_articles(llm):
+    llm["batch"].append(json.dumps({"articles": [{"id": "0", "events": ["Batched."]}]}))
+    engine = EventExtractionEngine(max_wait_ms=200)
+    futures = _submit_together(engine, 2)
+    assert [f.result(timeout=5) for f in futures] == ["Batched.", "events of a1"]
+    assert engine.stats()["fallbacks"] == 1
+
+
+def test_unparseable_batch_is_retried_in_parallel(llm):
+    llm["batch"].append("not json")
+    engine = EventExtractionEngine(max_wait_ms=200, max_concurrent=4)
+    futures = _submit_together(engine, 4)
+    assert [f.result(timeout=5) for f in futures] == [f"events of a{i}" for i in range(4)]
+    assert llm["peak"] > 1
+
+
+def test_futures_fail_when_the_engine_breaks(llm, monkeypatch):
+    engine = EventExtractionEngine(max_wait_ms=50)
+    monkeypatch.setattr(engine, "_answer_batch", lambda batch: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        engine.submit(ARTICLE).result(timeout=5)
+
+    def broken_pack(pending):
+        raise RuntimeError("collector failed")
+
+    engine = EventExtractionEngine(max_wait_ms=50)
+    monkeypatch.setattr(engine, "_pack", broken_pack)
+    with pytest.raises(RuntimeError):
+        engine.submit(ARTICLE).result(timeout=5)
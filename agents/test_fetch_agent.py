@@ -0,0 +1,41 @@
+import asyncio
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, StateGraph
+
+from agents import fetch_agent
+from agents.fetch_agent import AsyncNewsState, async_node
+
+
+def _graph():
+    def start(state):
+        return {**state, "run_id": "run", "keywords": ["rates"]}
+
+    async def summarize(state):
+        return {"insight_ids": ["a", "b"], "superseded_insight_ids": ["b"], "timings": {"summarize": 1.0}}
+
+    graph = StateGraph(AsyncNewsState)
+    graph.add_node("start", async_node("start", start, starts_run=True))
+    graph.add_node("summarize", summarize)
+    graph.set_entry_point("start")
+    graph.add_edge("start", "summarize")
+    graph.add_edge("summarize", END)
+    return graph.compile(checkpointer=MemorySaver())
+
+
+def test_reducer_keys_start_empty_on_every_checkpointed_run():
+    chain = _graph()
+    config = {"configurable": {"thread_id": "same-thread"}}
+    for _ in range(2):
+        state = asyncio.run(chain.ainvoke({"user_input": "interest rates"}, config))
+        assert state["insight_ids"] == ["a", "b"]
+        assert state["superseded_insight_ids"] == ["b"]
+        assert sorted(state["timings"]) == ["start", "summarize"]
+
+
+def test_missing_article_batch_is_recreated():
+    fetch_agent.release_article_batch("gone")
+    batch = fetch_agent.get_article_batch("gone")
+    assert batch.total is None and batch.stale == {}
+    assert fetch_agent.get_article_batch("gone") is batch
+    fetch_agent.release_article_batch("gone")
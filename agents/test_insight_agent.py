@@ -0,0 +1,63 @@
+import re
+
+import pytest
+
+from agents import insight_agent
+from agents.insight_agent import chunk_text
+
+
+class WordTokenizer:
+    """One token per word, plus two special tokens like BART's <s> and </s>."""
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def __call__(self, text, add_special_tokens=True, return_offsets_mapping=False):
+        texts = [text] if isinstance(text, str) else text
+        spans = [[m.span() for m in re.finditer(r"\S+", t)] for t in texts]
+        encoded = {"input_ids": [list(range(len(s))) for s in spans]}
+        if return_offsets_mapping:
+            encoded["offset_mapping"] = spans
+        if isinstance(text, str):
+            encoded = {key: value[0] for key, value in encoded.items()}
+        return encoded
+
+
+def split_sentences(text):
+    return [sentence.strip() for sentence in re.findall(r"[^.]+\.", text)]
+
+
+@pytest.fixture(autouse=True)
+def tokenizer(monkeypatch):
+    monkeypatch.setattr(insight_agent, "ensure_nltk_data", lambda: None)
+    monkeypatch.setattr(insight_agent, "sent_tokenize", split_sentences)
+    monkeypatch.setattr(insight_agent, "get_summarizer_tokenizer", WordTokenizer)
+
+
+def _words(chunk):
+    return len(chunk.split())
+
+
+def test_short_text_is_one_chunk():
+    assert chunk_text("One two three. Four five.", max_tokens=12) == ["One two three. Four five."]
+    assert chunk_text("   ") == []
+
+
+def test_chunks_fit_the_budget_with_special_tokens():
+    text = " ".join(f"Sentence {i} has five words." for i in range(20))
+    chunks = chunk_text(text, max_tokens=12, overlap_tokens=0)
+    assert all(_words(chunk) <= 10 for chunk in chunks)
+    assert " ".join(chunks) == text
+
+
+def test_trailing_sentences_overlap_into_the_next_chunk():
+    text = " ".join(f"S{i} a b c." for i in range(6))
+    chunks = chunk_text(text, max_tokens=14, overlap_tokens=4)
+    assert chunks == ["S0 a b c. S1 a b c. S2 a b c.", "S2 a b c. S3 a b c. S4 a b c.", "S4 a b c. S5 a b c."]
+
+
+def test_long_sentences_are_cut_at_token_boundaries():
+    text = " ".join(f"w{i}" for i in range(25)) + "."
+    chunks = chunk_text(text, max_tokens=12, overlap_tokens=0)
+    assert [_words(chunk) for chunk in chunks] == [10, 10, 5]
+    assert " ".join(chunks) == text
@@ -0,0 +1,22 @@
+import numpy as np
+
+from agents.similarity import select_top_k
+
+
+def test_best_first_with_ties_in_index_order():
+    scores = np.array([0.2, 0.9, 0.5, 0.9])
+    assert select_top_k(scores) == [(0.9, 1), (0.9, 3), (0.5, 2), (0.2, 0)]
+
+
+def test_threshold_and_top_k():
+    scores = np.array([0.1, 0.7, 0.4, 0.8, 0.6])
+    assert select_top_k(scores, top_k=2) == [(0.8, 3), (0.7, 1)]
+    assert select_top_k(scores, threshold=0.6) == [(0.8, 3), (0.7, 1), (0.6, 4)]
+    assert select_top_k(scores, top_k=10, threshold=0.75) == [(0.8, 3)]
+    assert select_top_k(scores, threshold=0.9) == []
+
+
+def test_matches_a_full_sort():
+    scores = np.random.default_rng(0).random(1000)
+    expected = sorted(((float(s), i) for i, s in enumerate(scores)), reverse=True)[:15]
+    assert select_top_k(scores, top_k=15) == expected
@@ -0,0 +1,115 @@
+"""
+Title-matching latency as the news collection grows: the old approach
+(pull every article into Python and score it) against ANN candidate
+selection (top-k per keyword from Chroma with a recency filter, then an
+exact local re-rank). Uses an in-process Chroma client and synthetic
+unit vectors, so no server or model is needed.
+
+    python benchmarks/ann_candidates.py --sizes 1000 10000 100000
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from agents.fetchers.news_fetcher import find_candidate_articles  # noqa: E402
+from agents.similarity import rank_embeddings  # noqa: E402
+from storage import chroma_db  # noqa: E402
+
+DIM = 384
+NUM_KEYWORDS = 5
+TOP_K = 15
+INSERT_BATCH = 5000
+
+
+def unit_vectors(rng, n):
+    vectors = rng.standard_normal((n, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def populate(collection, rng, size, start):
+    """Add articles start..size; a third of them are older than the recency window."""
+    now = time.time()
+    for offset in range(start, size, INSERT_BATCH):
+        count = min(INSERT_BATCH, size - offset)
+        ids = [f"article-{i}" for i in range(offset, offset + count)]
+        collection.add(
+            ids=ids,
+            embeddings=unit_vectors(rng, count).tolist(),
+            documents=[f"Synthetic headline {i}" for i in range(offset, offset + count)],
+            metadatas=[
+                {
+                    "title": f"Synthetic headline {i}",
+                    "url": f"https://example.com/{i}",
+                    "inserted_at": now - (30 * 24 * 3600 if i % 3 == 0 else 3600),
+                }
+                for i in range(offset, offset + count)
+            ],
+        )
+
+
+def full_scan(collection, keyword_embeddings):
+    # Paged, as one get() over ~100k ids exceeds SQLite's variable limit
+    embeddings = []
+    for offset in range(0, collection.count(), INSERT_BATCH):
+        data = collection.get(include=["embeddings", "metadatas"], limit=INSERT_BATCH, offset=offset)
+        embeddings.extend(data["embeddings"])
+    return rank_embeddings(keyword_embeddings, np.asarray(embeddings), top_k=TOP_K, threshold=None)
+
+
+def ann_candidates(keyword_embeddings):
+    with contextlib.redirect_stdout(io.StringIO()):
+        candidates = find_candidate_articles(keyword_embeddings)
+    vectors = np.array([c["embedding"] for c in candidates], dtype=np.float32)
+    return rank_embeddings(keyword_embeddings, vectors, top_k=TOP_K, threshold=None)
+
+
+def timed(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(1000 * (time.perf_counter() - start))
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--skip-scan-above", type=int, default=100000,
+                        help="skip the full scan for larger collections")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        chroma_db.set_client(chromadb.PersistentClient(path=tmp))
+        collection = chroma_db.get_collection("news")
+
+        print(f"{'articles':>10} | {'full scan (ms)':>15} | {'ANN top-k (ms)':>15}")
+        populated = 0
+        for size in sorted(args.sizes):
+            populate(collection, rng, size, populated)
+            populated = size
+            keyword_embeddings = unit_vectors(rng, NUM_KEYWORDS)
+
+            ann_ms = timed(lambda: ann_candidates(keyword_embeddings), args.runs)
+            if size <= args.skip_scan_above:
+                scan_ms = f"{timed(lambda: full_scan(collection, keyword_embeddings), args.runs):15.1f}"
+            else:
+                scan_ms = f"{'skipped':>15}"
+            print(f"{size:>10} | {scan_ms} | {ann_ms:15.1f}")
+
+
+if __name__ == "__main__":
+    main()
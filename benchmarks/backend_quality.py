@@ -0,0 +1,194 @@
+"""
+Compare the int8 / ONNX inference backends with the fp32 PyTorch models on
+a fixed article sample: latency, peak RSS, and agreement with fp32 output
+(ROUGE for distilbart summaries, cosine similarity for MiniLM embeddings).
+Each backend runs in its own interpreter so RSS numbers do not mix.
+
+    python benchmarks/backend_quality.py --backends torch int8 onnx
+
+Exits non-zero when a backend falls below --min-rouge-l or --min-cosine.
+"""
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SAMPLE_PATH = os.path.join(REPO_ROOT, "benchmarks", "data", "articles.json")
+sys.path.insert(0, REPO_ROOT)
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def load_sample():
+    with open(SAMPLE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_worker(kind: str, backend: str):
+    """Runs inside the child interpreter; prints one JSON result line."""
+    from agents import inference_backends
+    from agents.model_registry import EMBEDDING_MODEL_NAME, SUMMARIZER_MODEL_NAME
+    from agents.summarization_engine import run_summarizer
+
+    articles = load_sample()
+    baseline_rss = peak_rss_mb()
+    start = time.perf_counter()
+
+    if kind == "summarizer":
+        model = inference_backends.load_summarizer(SUMMARIZER_MODEL_NAME, backend)
+        load_seconds = time.perf_counter() - start
+        texts = [a["text"] for a in articles]
+        run_summarizer(model, texts[:1])  # warm-up
+        start = time.perf_counter()
+        outputs = [run_summarizer(model, [text])[0] for text in texts]
+    else:
+        model = inference_backends.load_sentence_transformer(EMBEDDING_MODEL_NAME, backend)
+        load_seconds = time.perf_counter() - start
+        texts = [a["title"] for a in articles] + [a["text"] for a in articles]
+        model.encode(texts[:1])  # warm-up
+        start = time.perf_counter()
+        outputs = model.encode(texts, normalize_embeddings=True).tolist()
+
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "outputs": outputs,
+        "load_seconds": load_seconds,
+        "ms_per_item": 1000 * elapsed / len(texts),
+        "model_rss_mb": peak_rss_mb() - baseline_rss,
+    }))
+
+
+def spawn_worker(kind: str, backend: str):
+    result = subprocess.run(
+        [sys.executable, __file__, "--worker", kind, backend],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        last_line = (result.stderr.strip().splitlines() or ["unknown error"])[-1]
+        return None, last_line
+    return json.loads(result.stdout.strip().splitlines()[-1]), None
+
+
+def _tokens(text: str):
+    return re.findall(r"\w+", text.lower())
+
+
+def _ngrams(tokens, n):
+    return [tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+
+
+def _f1(overlap, candidate_total, reference_total):
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / candidate_total, overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(candidate: str, reference: str, n: int) -> float:
+    cand, ref = _ngrams(_tokens(candidate), n), _ngrams(_tokens(reference), n)
+    remaining = {}
+    for gram in ref:
+        remaining[gram] = remaining.get(gram, 0) + 1
+    overlap = 0
+    for gram in cand:
+        if remaining.get(gram, 0) > 0:
+            remaining[gram] -= 1
+            overlap += 1
+    return _f1(overlap, len(cand), len(ref))
+
+
+def rouge_l(candidate: str, reference: str) -> float:
+    cand, ref = _tokens(candidate), _tokens(reference)
+    previous = [0] * (len(ref) + 1)
+    for c in cand:
+        current = [0]
+        for j, r in enumerate(ref):
+            current.append(previous[j] + 1 if c == r else max(previous[j + 1], current[j]))
+        previous = current
+    return _f1(previous[-1], len(cand), len(ref))
+
+
+def cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = (sum(x * x for x in a) ** 0.5) * (sum(y * y for y in b) ** 0.5)
+    return dot / norm if norm else 0.0
+
+
+def compare(kind: str, reference: dict, candidate: dict) -> dict:
+    pairs = list(zip(candidate["outputs"], reference["outputs"]))
+    if kind == "summarizer":
+        quality = {
+            "rouge1": sum(rouge_n(c, r, 1) for c, r in pairs) / len(pairs),
+            "rouge2": sum(rouge_n(c, r, 2) for c, r in pairs) / len(pairs),
+            "rougeL": sum(rouge_l(c, r) for c, r in pairs) / len(pairs),
+        }
+    else:
+        sims = [cosine(c, r) for c, r in pairs]
+        quality = {"mean_cosine": sum(sims) / len(sims), "min_cosine": min(sims)}
+
+    quality["speedup"] = reference["ms_per_item"] / candidate["ms_per_item"]
+    quality["rss_saved_mb"] = reference["model_rss_mb"] - candidate["model_rss_mb"]
+    return quality
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8"])
+    parser.add_argument("--models", nargs="+", default=["summarizer", "embedder"])
+    parser.add_argument("--min-rouge-l", type=float, default=0.7)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--worker", nargs=2, metavar=("KIND", "BACKEND"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        return
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    degraded = False
+    for kind in args.models:
+        print(f"\n== {kind} ==")
+        results = {}
+        for backend in backends:
+            result, error = spawn_worker(kind, backend)
+            if error:
+                print(f"{backend:<6} failed: {error}")
+                continue
+            results[backend] = result
+            print(
+                f"{backend:<6} load {result['load_seconds']:6.2f}s | "
+                f"{result['ms_per_item']:8.1f} ms/item | "
+                f"model RSS {result['model_rss_mb']:7.1f} MB"
+            )
+
+        if "torch" not in results:
+            print("fp32 reference failed, skipping comparison")
+            degraded = True
+            continue
+
+        for backend, result in results.items():
+            if backend == "torch":
+                continue
+            quality = compare(kind, results["torch"], result)
+            print(f"{backend:<6} vs fp32: " + ", ".join(f"{k}={v:.3f}" for k, v in quality.items()))
+            if kind == "summarizer" and quality["rougeL"] < args.min_rouge_l:
+                print(f"  ⚠️ ROUGE-L below {args.min_rouge_l}")
+                degraded = True
+            if kind == "embedder" and quality["min_cosine"] < args.min_cosine:
+                print(f"  ⚠️ cosine agreement below {args.min_cosine}")
+                degraded = True
+
+    sys.exit(1 if degraded else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+HTML-to-text throughput and output size on a saved corpus of article pages:
+the old extraction (BeautifulSoup html.parser, every <p> joined) against
+the lxml extractor with boilerplate removal.
+
+    python benchmarks/html_extraction.py --corpus benchmarks/data/html
+    python benchmarks/html_extraction.py --save https://example.com/story ...
+
+--save downloads pages into the corpus directory first, so the comparison
+can be rerun offline on real publisher markup.
+
+The sample_*.html files committed in benchmarks/data/html are small
+synthetic pages, a smoke fixture that keeps the script runnable offline.
+Their timings say nothing about real publisher markup; save real pages
+before quoting numbers.
+"""
+import argparse
+import glob
+import hashlib
+import os
+import statistics
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_CORPUS = os.path.join(REPO_ROOT, "benchmarks", "data", "html")
+sys.path.insert(0, REPO_ROOT)
+
+from agents.fetchers.article_fetcher import fetch_html  # noqa: E402
+from agents.fetchers.html_extractor import html_to_text  # noqa: E402
+
+
+def legacy_extract(html: bytes) -> str:
+    """The extraction extract_article_from_url used before the lxml extractor."""
+    soup = BeautifulSoup(html, "html.parser")
+    paragraphs = soup.find_all("p")
+    text = " ".join([p.get_text() for p in paragraphs])
+    return text.strip()
+
+
+def save_pages(urls, corpus):
+    os.makedirs(corpus, exist_ok=True)
+    for url in urls:
+        try:
+            html, _ = fetch_html(url)
+        except Exception as e:
+            print(f"skipping {url}: {e}")
+            continue
+        name = hashlib.md5(url.encode()).hexdigest()[:12] + ".html"
+        with open(os.path.join(corpus, name), "wb") as f:
+            f.write(html)
+        print(f"saved {url} -> {name} ({len(html)} bytes)")
+
+
+def measure(extract, pages, runs):
+    """Median seconds over the whole corpus, and the output of the last run."""
+    timings, outputs = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        outputs = [extract(html) for html in pages]
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--save", nargs="+", metavar="URL", help="download pages into the corpus first")
+    args = parser.parse_args()
+
+    if args.save:
+        save_pages(args.save, args.corpus)
+
+    paths = sorted(glob.glob(os.path.join(args.corpus, "*.htm*")))
+    if not paths:
+        sys.exit(f"no .html files in {args.corpus}")
+    pages = []
+    for path in paths:
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    total_mb = sum(map(len, pages)) / (1024 * 1024)
+
+    legacy_seconds, legacy_out = measure(legacy_extract, pages, args.runs)
+    lxml_seconds, lxml_out = measure(html_to_text, pages, args.runs)
+
+    print(f"{len(pages)} pages, {total_mb:.2f} MB of HTML\n")
+    print(f"{'page':<28} | {'legacy chars':>12} | {'lxml chars':>10}")
+    for path, old, new in zip(paths, legacy_out, lxml_out):
+        print(f"{os.path.basename(path)[:28]:<28} | {len(old):>12} | {len(new):>10}")
+
+    print()
+    for name, seconds, outputs in (("legacy", legacy_seconds, legacy_out), ("lxml", lxml_seconds, lxml_out)):
+        print(
+            f"{name:<6} {1000 * seconds / len(pages):8.2f} ms/page | "
+            f"{len(pages) / seconds:8.1f} pages/s | {total_mb / seconds:7.2f} MB/s | "
+            f"{sum(map(len, outputs)) / len(outputs):8.0f} chars/page"
+        )
+    print(f"\nspeedup {legacy_seconds / lxml_seconds:.1f}x, "
+          f"output {sum(map(len, lxml_out)) / max(1, sum(map(len, legacy_out))):.0%} of legacy length")
+
+
+if __name__ == "__main__":
+    main()
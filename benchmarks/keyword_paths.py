@@ -0,0 +1,103 @@
+"""
+Compare local (KeyBERT on MiniLM) keyword extraction with the GPT-4o
+keyword prompt on a fixed set of queries: latency, keyword overlap, how
+often the local path would fall back to the LLM, and downstream recall of
+the headlines the LLM keywords would select in the filtering stage.
+
+    python benchmarks/keyword_paths.py --top-k 5
+
+The LLM path needs the Azure OpenAI settings; its answers go through the
+LLM response cache like in the app.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SAMPLE_PATH = os.path.join(REPO_ROOT, "benchmarks", "data", "queries.json")
+sys.path.insert(0, REPO_ROOT)
+
+from agents.keyword_extractor import KEYWORD_MIN_CONFIDENCE, extract_keywords_local  # noqa: E402
+from agents.model_registry import get_embedding_model  # noqa: E402
+from agents.openai_agent import extract_structured_events  # noqa: E402
+from agents.similarity import SIMILARITY_THRESHOLD, encode_texts, rank_embeddings  # noqa: E402
+
+
+def split_keywords(text: str):
+    return [k.strip() for k in text.split(",") if k.strip()]
+
+
+def tokens(keywords):
+    return {t for keyword in keywords for t in re.findall(r"\w+", keyword.lower())}
+
+
+def jaccard(a, b) -> float:
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def selected(keywords, headline_embeddings, top_k):
+    if not keywords:
+        return set()
+    ranked = rank_embeddings(
+        encode_texts(get_embedding_model(), keywords),
+        headline_embeddings,
+        top_k=top_k,
+        threshold=SIMILARITY_THRESHOLD,
+    )
+    return {idx for _, idx in ranked}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top-k", type=int, default=5, help="headlines kept per query, like FILTER_TOP_K")
+    args = parser.parse_args()
+
+    with open(SAMPLE_PATH, "r", encoding="utf-8") as f:
+        sample = json.load(f)
+    headline_embeddings = encode_texts(get_embedding_model(), sample["headlines"])
+    extract_keywords_local("warm-up")
+
+    rows = []
+    for query in sample["queries"]:
+        start = time.perf_counter()
+        local = extract_keywords_local(query)
+        local_ms = 1000 * (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        llm = split_keywords(extract_structured_events(query))
+        llm_ms = 1000 * (time.perf_counter() - start)
+
+        local_keywords = [k for k, _ in local]
+        confident = bool(local) and local[0][1] >= KEYWORD_MIN_CONFIDENCE
+        reference = selected(llm, headline_embeddings, args.top_k)
+        found = selected(local_keywords, headline_embeddings, args.top_k)
+        recall = len(reference & found) / len(reference) if reference else 1.0
+        rows.append({
+            "local_ms": local_ms,
+            "llm_ms": llm_ms,
+            "overlap": jaccard(tokens(local_keywords), tokens(llm)),
+            "recall": recall,
+            "confident": confident,
+        })
+        print(f"\n{query}")
+        print(f"  local ({local_ms:6.1f} ms{'' if confident else ', would fall back'}): {', '.join(local_keywords)}")
+        print(f"  llm   ({llm_ms:6.1f} ms): {', '.join(llm)}")
+        print(f"  token overlap {rows[-1]['overlap']:.2f} | headline recall vs llm {recall:.2f}")
+
+    confident_rows = [r for r in rows if r["confident"]]
+    print("\n== summary ==")
+    print(f"median latency: local {statistics.median(r['local_ms'] for r in rows):.1f} ms, "
+          f"llm {statistics.median(r['llm_ms'] for r in rows):.1f} ms")
+    print(f"mean keyword token overlap: {statistics.mean(r['overlap'] for r in rows):.2f}")
+    print(f"mean headline recall (all queries): {statistics.mean(r['recall'] for r in rows):.2f}")
+    if confident_rows:
+        print(f"mean headline recall (served locally): {statistics.mean(r['recall'] for r in confident_rows):.2f}")
+    print(f"served locally at confidence >= {KEYWORD_MIN_CONFIDENCE}: {len(confident_rows)}/{len(rows)}")
+
+
+if __name__ == "__main__":
+    main()
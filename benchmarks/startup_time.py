@@ -0,0 +1,85 @@
+"""
+Cold-start benchmark: time how long ``import controllers.news_controller``
+(what ``streamlit run ui/app.py`` pays before the first render) takes in a
+fresh interpreter, for the working tree and optionally a baseline revision.
+
+    python benchmarks/startup_time.py --baseline <git-rev> --runs 3
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); "
+    "import controllers.news_controller; "
+    "print(time.perf_counter() - start)"
+)
+WARM_UP_SNIPPET = (
+    "import time; start = time.perf_counter(); "
+    "from agents.model_registry import warm_up; warm_up(); "
+    "print(time.perf_counter() - start)"
+)
+
+
+def time_snippet(tree: str, snippet: str, runs: int):
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", snippet],
+            cwd=tree, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            last_line = (result.stderr.strip().splitlines() or ["unknown error"])[-1]
+            return None, last_line
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings, None
+
+
+def report(label: str, tree: str, snippet: str, runs: int):
+    timings, error = time_snippet(tree, snippet, runs)
+    if error:
+        print(f"{label:<28} failed: {error}")
+    else:
+        print(
+            f"{label:<28} median {statistics.median(timings):7.2f}s "
+            f"(min {min(timings):.2f}s, max {max(timings):.2f}s, runs={runs})"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--baseline", help="git revision to compare against")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--warm-up", action="store_true",
+        help="also time the explicit model warm-up step on the working tree",
+    )
+    args = parser.parse_args()
+
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tmp:
+            worktree = os.path.join(tmp, "baseline")
+            subprocess.run(
+                ["git", "worktree", "add", "--detach", worktree, args.baseline],
+                cwd=REPO_ROOT, check=True, capture_output=True,
+            )
+            try:
+                report(f"import ({args.baseline})", worktree, IMPORT_SNIPPET, args.runs)
+            finally:
+                subprocess.run(
+                    ["git", "worktree", "remove", "--force", worktree],
+                    cwd=REPO_ROOT, capture_output=True,
+                )
+
+    report("import (working tree)", REPO_ROOT, IMPORT_SNIPPET, args.runs)
+    if args.warm_up:
+        report("warm_up (working tree)", REPO_ROOT, WARM_UP_SNIPPET, args.runs)
+
+
+if __name__ == "__main__":
+    main()
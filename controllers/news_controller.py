@@ -1,21 +1,52 @@
-import chromadb
-from agents.fetch_agent import get_news_chain_object
-from storage.chroma_db import get_documents, showcollectioncount
+import asyncio
+import time
+
+from agents.event_extraction import get_event_extraction_engine
+from agents.fetch_agent import StoryResult, get_async_news_chain_object, get_news_chain_object
+from agents.fetchers.news_fetcher import provider_stats
+from agents.keyword_extractor import keyword_stats
+from agents.model_registry import warm_up
+from agents.near_duplicates import near_duplicate_stats
+from agents.openai_agent import llm_stats
+from agents.query_cache import SEMANTIC_CACHE_ENABLED, get_query_cache
+from agents.summarization_engine import summarization_stats
+from storage.chroma_db import (
+    DEFAULT_DOCUMENT_LIMIT,
+    get_client,
+    get_documents,
+    get_latest_documents,
+    showcollectioncount,
+)
+from storage.article_store import get_article_store
+from storage.embedding_cache import embedding_cache_stats
 
 
 class NewsController:
 
-    def __init__(self):
-        self.db_client = chromadb.HttpClient(host="localhost", port=8000)
+    @property
+    def db_client(self):
+        return get_client()
 
+    def warm_up(self):
+        """Load models and open the Chroma connection ahead of the first request."""
+        warm_up()
+        showcollectioncount()
 
-    def get_documents(self, category):
+    def get_documents(self, category, limit=DEFAULT_DOCUMENT_LIMIT):
+        """Up to ``limit`` documents of the category; ``limit=None`` reads them all, page by page."""
         try:
             print(f"Fetching documents for category: {category}")
-            return get_documents(category)
+            return get_documents(category, limit=limit)
         except Exception as e:
             return [], [{"error": str(e)}]
         
+    def get_latest_documents(self, category, n=1):
+        try:
+            return get_latest_documents(category, n)
+        except Exception as e:
+            print(f"❌ Error fetching latest documents for {category}: {e}")
+            return []
+
     def get_documents_count(self):
         try:
             info = showcollectioncount()
@@ -23,13 +54,149 @@ class NewsController:
         except Exception as e:
             return [], [{"error": str(e)}]
     
-    def fetch_story(self, user_input):
+    def get_embedding_cache_stats(self):
+        return embedding_cache_stats()
+
+    def get_article_store_stats(self):
+        """Stored article bodies, hits, 304 revalidations and evictions."""
+        return get_article_store().stats()
+
+    def get_near_duplicate_stats(self):
+        """Articles skipped as near-duplicates, by headline, by body or reused from the corpus."""
+        return near_duplicate_stats()
+
+    def get_summarization_stats(self):
+        """Batching stats, plus queue depth and per-worker utilization when the pool is on."""
+        return summarization_stats()
+
+    def get_news_provider_stats(self):
+        """Response cache hit ratio, coalesced calls and quota saved per news provider."""
+        return provider_stats()
+
+    def get_llm_stats(self):
+        """LLM calls, cache hits, latency and tokens used/saved per prompt mode."""
+        return llm_stats()
+
+    def get_event_extraction_stats(self):
+        """Batched GPT-4o event prompts, articles per batch and single-call fallbacks."""
+        return get_event_extraction_engine().stats()
+
+    def get_keyword_stats(self):
+        """Queries whose keywords were extracted locally vs. by the LLM."""
+        return keyword_stats()
+
+    def get_query_cache_stats(self):
+        """Semantic cache hit rate and the pipeline time it saved."""
+        return get_query_cache().stats()
+
+    def _stream_pipeline(self, user_input):
+        """
+        Run the full graph, yielding its progress and story token events, then
+        a final "result" event. Remembers which story answered the question.
+        """
+        start = time.perf_counter()
+        state = {}
+        for mode, chunk in get_news_chain_object().stream(
+            {"user_input": user_input}, stream_mode=["custom", "values"]
+        ):
+            if mode == "custom":
+                yield chunk
+            else:
+                state = chunk
+
+        yield {"type": "result", "result": self._finish_pipeline(user_input, state, start)}
+
+    def _finish_pipeline(self, user_input, state, start):
+        """StoryResult for a finished graph run; remembers which story answered the question."""
+        result = StoryResult.from_state(state)
+        if SEMANTIC_CACHE_ENABLED and result.story_id:
+            cache = get_query_cache()
+            cache.record_pipeline(time.perf_counter() - start)
+            cache.remember(user_input, result.story_id)
+        return result
+
+    def _run_pipeline(self, user_input):
+        for event in self._stream_pipeline(user_input):
+            pass
+        return event["result"]
+
+    def _cached_answer(self, user_input):
+        """The stored story for a near-duplicate recent question, or None."""
+        start = time.perf_counter()
+        cache = get_query_cache()
+        try:
+            hit = cache.lookup(user_input)
+        except Exception as e:
+            print(f"⚠️ Semantic cache lookup failed: {e}")
+            return None
+        if not hit:
+            return None
+
+        print(
+            f"♻️ Answering '{user_input}' with the story for "
+            f"'{hit['matched_query']}' (similarity {hit['similarity']:.2f})"
+        )
+        if cache.needs_refresh(hit):
+            cache.refresh_in_background(hit["id"], lambda: self._run_pipeline(user_input))
+        seconds = time.perf_counter() - start
+        cache.record_hit(seconds)
+
+        meta = hit["metadata"]
+        return StoryResult(
+            status="success",
+            story=meta.get("generated_story") or hit["document"],
+            events=[line for line in meta.get("events", "").split("\n") if line.strip()],
+            sources=[{"url": url} for url in meta.get("sources", "").split("\n") if url.strip()],
+            timings={"semantic_cache": seconds},
+            story_id=hit["id"],
+            run_id=meta.get("run_id"),
+            cached=True,
+            similarity=hit["similarity"],
+        )
+
+    def stream_story(self, user_input):
+        """
+        Answer a question as a stream of events (dicts with a "type"):
+        "progress" (stage, message) while the pipeline runs, "token" (text)
+        as the story is written, and one final "result" carrying a
+        StoryResult (status "error" with the message if anything failed).
+        Near-duplicates of a recent question are answered from the stored
+        story without running the pipeline.
+        """
         try:
-            # Placeholder for actual story fetching logic
-            # This should call the appropriate agent or service to fetch stories
-            news_chain = get_news_chain_object()
-            news_chain.invoke({"user_input": user_input})
+            cached = self._cached_answer(user_input) if SEMANTIC_CACHE_ENABLED else None
+            if cached:
+                yield {"type": "result", "result": cached}
+                return
+            yield from self._stream_pipeline(user_input)
+        except Exception as e:
+            yield {
+                "type": "result",
+                "result": StoryResult(status="error", error=f"Error fetching story: {str(e)}"),
+            }
+
+    def fetch_story(self, user_input) -> StoryResult:
+        """
+        Like stream_story, but only returns the final StoryResult: the story,
+        its events and source articles, and seconds spent per pipeline stage.
+        The story is written to Chroma in the background.
+        """
+        for event in self.stream_story(user_input):
+            if event["type"] == "result":
+                return event["result"]
 
-            return f"Success: {user_input}"
+    async def afetch_story(self, user_input) -> StoryResult:
+        """
+        fetch_story for async callers: runs the async graph with ainvoke, where
+        each article is downloaded and summarized in its own parallel branch.
+        """
+        try:
+            if SEMANTIC_CACHE_ENABLED:
+                cached = await asyncio.to_thread(self._cached_answer, user_input)
+                if cached:
+                    return cached
+            start = time.perf_counter()
+            state = await get_async_news_chain_object().ainvoke({"user_input": user_input})
+            return await asyncio.to_thread(self._finish_pipeline, user_input, state, start)
         except Exception as e:
-            return f"Error fetching story: {str(e)}"
\ No newline at end of file
+            return StoryResult(status="error", error=f"Error fetching story: {str(e)}")
@@ -0,0 +1,139 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+
+ARTICLE_STORE_PATH = os.getenv("ARTICLE_STORE_PATH", ".cache/articles.sqlite3")
+# Compressed bytes kept on disk before least recently used bodies are evicted
+ARTICLE_STORE_MAX_MB = float(os.getenv("ARTICLE_STORE_MAX_MB", "200"))
+
+
+@dataclass
+class StoredArticle:
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    # Seconds since the body was last downloaded or revalidated
+    age: float
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+class ArticleStore:
+    """
+    Extracted article bodies on disk, zlib-compressed in SQLite and keyed by
+    URL hash, with the ETag / Last-Modified validators they were served
+    with so they can be revalidated with a conditional GET. Once the
+    compressed total passes ``max_bytes`` the least recently read bodies
+    are evicted.
+    """
+
+    def __init__(self, path: str = ARTICLE_STORE_PATH, max_bytes: int = int(ARTICLE_STORE_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            " key TEXT PRIMARY KEY, body BLOB NOT NULL, size INTEGER NOT NULL,"
+            " etag TEXT, last_modified TEXT,"
+            " validated_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS articles_accessed ON articles (accessed_at)")
+        self._db.commit()
+
+    def get(self, url: str) -> Optional[StoredArticle]:
+        key = url_key(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, validated_at FROM articles WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            now = time.time()
+            self._db.execute("UPDATE articles SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+        return StoredArticle(
+            text=zlib.decompress(row[0]).decode("utf-8"),
+            etag=row[1],
+            last_modified=row[2],
+            age=now - row[3],
+        )
+
+    def put(self, url: str, text: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        body = zlib.compress(text.encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO articles"
+                " (key, body, size, etag, last_modified, validated_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url_key(url), body, len(body), etag, last_modified, now, now),
+            )
+            self._evict()
+            self._db.commit()
+
+    def mark_validated(self, url: str):
+        """The origin answered 304: the stored body is current again."""
+        with self._lock:
+            self._db.execute("UPDATE articles SET validated_at = ? WHERE key = ?", (time.time(), url_key(url)))
+            self._db.commit()
+            self.revalidated += 1
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM articles").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        doomed, freed = [], 0
+        for key, size in self._db.execute("SELECT key, size FROM articles ORDER BY accessed_at"):
+            if freed >= excess:
+                break
+            doomed.append((key,))
+            freed += size
+        self._db.executemany("DELETE FROM articles WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM articles"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "stored_mb": size / (1024 * 1024),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "not_modified": self.revalidated,
+            "evictions": self.evictions,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_article_store() -> ArticleStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArticleStore()
+        return _store
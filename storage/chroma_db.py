@@ -1,23 +1,225 @@
 import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 import chromadb
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.errors import NotFoundError
+from chromadb.utils.embedding_functions import register_embedding_function
 from datetime import datetime
+from typing import Iterator, List, Optional, Sequence
 
 
-# ✅ Initialize ChromaDB client using new API format
-client = chromadb.HttpClient(host="localhost", port=8000)
+CHROMA_HOST = os.getenv("CHROMA_HOST", "localhost")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8000"))
+CHROMA_WRITE_BATCH_SIZE = int(os.getenv("CHROMA_WRITE_BATCH_SIZE", "100"))
+# "shared": embed with the pipeline's MiniLM encoder; "default": Chroma's built-in one
+CHROMA_EMBEDDING_FUNCTION = os.getenv("CHROMA_EMBEDDING_FUNCTION", "shared")
+# Write stories off the response path on a background thread
+CHROMA_ASYNC_WRITES = os.getenv("CHROMA_ASYNC_WRITES", "1") == "1"
+# Distance space for newly created collections; existing ones keep theirs
+# until migrate_collection is run, and their distances are converted
+COLLECTION_METADATA = {"hnsw:space": "cosine"}
 
-# ✅ Create/get collections by category
-collections = {
-    "news": client.get_or_create_collection("news_articles"),
-    "news_insights": client.get_or_create_collection("news_insights"),
-    "news_stories": client.get_or_create_collection("news_stories"),
+# get_latest_documents first looks this far back (seconds), then doubles the window
+LATEST_FIRST_WINDOW = 15 * 60
+# get_documents returns this many records unless asked for another limit
+DEFAULT_DOCUMENT_LIMIT = 10
+
+# Category -> Chroma collection name
+COLLECTION_NAMES = {
+    "news": "news_articles",
+    "news_insights": "news_insights",
+    "news_stories": "news_stories",
+    "story_queries": "news_story_queries",
 }
 
+# Client and collections are created on first use, not at import time
+_client = None
+_collections = {}
+_lock = threading.Lock()
+_write_pool = None
+
+
+def get_client():
+    global _client
+    with _lock:
+        if _client is None:
+            _client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
+        return _client
+
+
+@register_embedding_function
+class SharedEncoderEmbeddingFunction(EmbeddingFunction):
+    """
+    Embeds with the same cached MiniLM encoder the pipeline uses, so stored
+    vectors, query_texts and the filtering stage share one vector space.
+    """
+
+    def __init__(self):
+        pass
+
+    def __call__(self, input: Documents) -> Embeddings:
+        # Imported here so storage does not load models at import time
+        from agents.model_registry import get_embedding_model
+        from agents.similarity import encode_texts
+
+        return encode_texts(get_embedding_model(), list(input)).tolist()
+
+    @staticmethod
+    def name() -> str:
+        return "news_summariser_shared_encoder"
+
+    def get_config(self) -> dict:
+        return {}
+
+    @staticmethod
+    def build_from_config(config: dict) -> "SharedEncoderEmbeddingFunction":
+        return SharedEncoderEmbeddingFunction()
+
+    def default_space(self) -> str:
+        return "cosine"
+
+
+def get_embedding_function():
+    if CHROMA_EMBEDDING_FUNCTION == "default":
+        return None
+    return SharedEncoderEmbeddingFunction()
+
+
+def _open_collection(client, name: str):
+    """
+    An existing collection is opened with the embedding function and distance
+    space it was created with (older deployments: Chroma's default function
+    and l2), since Chroma refuses a different function for a persisted
+    collection. Vectors are then always supplied by this module, so the
+    persisted function is never called. Only new collections get the shared
+    encoder and cosine space; see migrate_collection for existing ones.
+    """
+    try:
+        return client.get_collection(name)
+    except NotFoundError:
+        pass
+    recovered = _recover_migration(client, name)
+    if recovered is not None:
+        return recovered
+    kwargs = {"metadata": COLLECTION_METADATA}
+    embedding_function = get_embedding_function()
+    if embedding_function is not None:
+        kwargs["embedding_function"] = embedding_function
+    return client.get_or_create_collection(name, **kwargs)
+
+
+def _recover_migration(client, name: str):
+    """
+    Finish or undo a migrate_collection that stopped between its renames,
+    leaving nothing under ``name``. Returns the collection now called
+    ``name``, or None when there was nothing to recover.
+    """
+    legacy_name, staging_name = f"{name}__legacy", f"{name}__migrating"
+    try:
+        legacy = client.get_collection(legacy_name)
+    except NotFoundError:
+        return None
+    try:
+        staging = client.get_collection(staging_name)
+    except NotFoundError:
+        # The copy never took the name: put the original back
+        legacy.modify(name=name)
+        print(f"⚠️ Restored '{name}' after an interrupted migration")
+        return legacy
+    # The old collection is only renamed once the copy is complete
+    staging.modify(name=name)
+    client.delete_collection(legacy_name)
+    print(f"⚠️ Finished an interrupted migration of '{name}'")
+    return staging
+
+
+def get_collection(category: str):
+    if category not in COLLECTION_NAMES:
+        raise ValueError(f"Unknown category: {category}")
+    if category not in _collections:
+        client = get_client()
+        with _lock:
+            if category not in _collections:
+                _collections[category] = _open_collection(client, COLLECTION_NAMES[category])
+    return _collections[category]
+
+
+def distance_space(collection) -> str:
+    """The collection's HNSW space: "l2" (Chroma's default), "cosine" or "ip"."""
+    space = (collection.metadata or {}).get("hnsw:space")
+    if space:
+        return space
+    try:
+        return collection.configuration_json.get("hnsw", {}).get("space") or "l2"
+    except Exception:
+        return "l2"
+
+
+def migrate_collection(category: str, batch_size: int = CHROMA_WRITE_BATCH_SIZE) -> int:
+    """
+    Rebuild a collection created before the shared encoder / cosine space
+    were introduced: records and their stored vectors are copied into a new
+    collection with the current settings, which then takes the old name.
+    Nothing is re-embedded (the default function is the same MiniLM model).
+    The old collection is renamed aside and only deleted once the copy has
+    its name, so a crash at any point leaves the data recoverable (see
+    _recover_migration). Returns the number of records copied.
+    """
+    client = get_client()
+    name = COLLECTION_NAMES[category]
+    try:
+        old = client.get_collection(name)
+    except NotFoundError:
+        old = _recover_migration(client, name)
+        if old is None:
+            raise
+    staging_name, legacy_name = f"{name}__migrating", f"{name}__legacy"
+    # Leftovers of an earlier run that got as far as renaming the copy, or no further
+    for leftover in (staging_name, legacy_name):
+        try:
+            client.delete_collection(leftover)
+        except Exception:
+            pass
+    kwargs = {"metadata": COLLECTION_METADATA}
+    embedding_function = get_embedding_function()
+    if embedding_function is not None:
+        kwargs["embedding_function"] = embedding_function
+    staging = client.create_collection(staging_name, **kwargs)
+
+    copied = 0
+    while True:
+        page = old.get(limit=batch_size, offset=copied, include=["documents", "metadatas", "embeddings"])
+        if not page["ids"]:
+            break
+        staging.upsert(
+            ids=page["ids"],
+            documents=page["documents"],
+            metadatas=page["metadatas"],
+            embeddings=page["embeddings"],
+        )
+        copied += len(page["ids"])
+
+    old.modify(name=legacy_name)
+    staging.modify(name=name)
+    client.delete_collection(legacy_name)
+    with _lock:
+        _collections.pop(category, None)
+    print(f"✅ Migrated {copied} records in '{name}' to the {distance_space(staging)} space")
+    return copied
+
+
+def get_collections():
+    return {category: get_collection(category) for category in COLLECTION_NAMES}
+
+
 def showcollectioncount():
     print("✅ Collections initialized:")
     info = []
 
-    for name, col in collections.items():
+    for name, col in get_collections().items():
         print(f"\n📁 Collection: {col.name}")
         print(f"Total Documents: {col.count()}")
         info.append({
@@ -29,7 +231,7 @@ def showcollectioncount():
 
 def showCollections():
     print("✅ Collections initialized:")
-    for name, col in collections.items():
+    for name, col in get_collections().items():
         print(f"\n📁 Collection: {col.name}")
         print(f"Total Documents: {col.count()}")
 
@@ -47,14 +249,12 @@ def showCollections():
             print("-" * 50)
 
 
-showcollectioncount()
-
 def clear_youtube_collection():
     """
     Deletes the YouTube collection from ChromaDB.
     """
     try:
-        youtube_collection = collections.get("youtube")
+        youtube_collection = get_collections().get("youtube")
         if youtube_collection:
             print("🧹 Clearing all documents in YouTube collection...")
             youtube_collection.delete(where={})  # Delete all documents
@@ -69,68 +269,421 @@ def generate_id_from_url(url: str) -> str:
     return hashlib.md5(url.encode()).hexdigest()
 
 
-def add_document(category: str, document: dict):
-    print("Adding document to ChromaDB collection...", category)
+def stable_document_id(category: str, document: dict) -> str:
     """
-    Add a document to the appropriate ChromaDB collection.
-    Automatically includes date_inserted in metadata.
+    Id that stays the same when the same item is ingested again:
+    the URL for news, the sorted URL set for insights, the text for stories
+    and the lower-cased question for story queries.
     """
-    try:
-        if category not in collections:
-            raise ValueError(f"Unknown category: {category}")
-
-        collection = collections[category]
-        doc_id = generate_id_from_url(document["title"])
-        today = datetime.now().strftime("%Y-%m-%d")
-
-        # 📌 Common metadata
-        metadata = {"date_inserted": today}
-        content = ""
-
-        if category == "news_stories":
-                metadata.update({
-                    "title": document.get("title", "AI-generated story"),
-                    "events": document.get("events", ""),
-                    "generated_story": document.get("story", ""),
-                })
-                content = document.get("story", document.get("events", ""))
-
-        elif category == "news_insights":
-            urls = document.get("urls", [])
-            if isinstance(urls, list):
-                urls = ", ".join(urls)
-            metadata.update({
-                "title": document.get("title", ""),
-                "urls": urls,
-                "summaries": document.get("summaries", []),
-                "events": document.get("events", []),
-            })
-            content = content = document.get("title", urls)
+    if category == "news" and document.get("url"):
+        return generate_id_from_url(document["url"])
+
+    if category == "news_insights" and document.get("urls"):
+        urls = document["urls"]
+        if isinstance(urls, str):
+            urls = urls.split(",")
+        url_set = sorted({u.strip() for u in urls if u.strip()})
+        if url_set:
+            return generate_id_from_url(",".join(url_set))
+
+    if category == "news_stories" and document.get("story"):
+        return generate_id_from_url(document["story"])
+
+    if category == "story_queries" and document.get("query"):
+        return generate_id_from_url(document["query"].strip().lower())
+
+    return generate_id_from_url(document["title"])
+
+
+def _clean_metadata(metadata: dict) -> dict:
+    """Chroma only accepts str/int/float/bool metadata values."""
+    cleaned = {}
+    for key, value in metadata.items():
+        if value is None:
+            value = ""
+        elif isinstance(value, (list, tuple)):
+            value = "\n".join(str(v) for v in value)
+        elif not isinstance(value, (str, int, float, bool)):
+            value = str(value)
+        cleaned[key] = value
+    return cleaned
 
-        elif category == "news":
+
+def _prepare_record(category: str, document: dict, run_id: Optional[str] = None):
+    """Build the (id, content, metadata) triple stored for a document."""
+    doc_id = stable_document_id(category, document)
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    # 📌 Common metadata
+    metadata = {"date_inserted": today, "inserted_at": time.time()}
+    if run_id:
+        metadata["run_id"] = run_id
+    content = ""
+
+    if category == "news_stories":
             metadata.update({
-                "title": document.get("title", ""),
-                "description": document.get("description", ""),
-                "url": document.get("url", ""),
+                "title": document.get("title", "AI-generated story"),
+                "events": document.get("events", ""),
+                "generated_story": document.get("story", ""),
+                "sources": document.get("sources", []),
             })
-            content = document.get("title", "")
+            content = document.get("story", document.get("events", ""))
 
-        # 🧠 Store in ChromaDB
-        collection.add(
-            documents=[content],
-            metadatas=[metadata],
-            ids=[doc_id]
-        )
+    elif category == "news_insights":
+        urls = document.get("urls", [])
+        if isinstance(urls, list):
+            urls = ", ".join(urls)
+        metadata.update({
+            "title": document.get("title", ""),
+            "urls": urls,
+            "summaries": document.get("summaries", []),
+            "events": document.get("events", []),
+            "content_hash": document.get("content_hash", ""),
+        })
+        content = document.get("title", urls)
+
+    elif category == "news":
+        metadata.update({
+            "title": document.get("title", ""),
+            "description": document.get("description", ""),
+            "url": document.get("url", ""),
+        })
+        content = document.get("title", "")
+
+    elif category == "story_queries":
+        metadata["story_id"] = document.get("story_id", "")
+        content = document.get("query", "")
 
-        print(f"✅ Document successfully added to '{category}' with ID: {doc_id}")
+    return doc_id, content or "", _clean_metadata(metadata)
+
+
+def _upsert(collection, batch):
+    kwargs = {
+        "ids": [doc_id for doc_id, _ in batch],
+        "documents": [record[1] for _, record in batch],
+        "metadatas": [record[2] for _, record in batch],
+    }
+    if all(record[3] is not None for _, record in batch):
+        kwargs["embeddings"] = [record[3] for _, record in batch]
+    collection.upsert(**kwargs)
+
+
+def add_documents(
+    category: str,
+    documents: List[dict],
+    run_id: Optional[str] = None,
+    batch_size: int = CHROMA_WRITE_BATCH_SIZE,
+    embeddings: Optional[Sequence] = None,
+) -> List[dict]:
+    """
+    Upsert many documents in batches of ``batch_size`` per request.
+
+    Ids are stable (see stable_document_id), so re-ingesting a story updates
+    it instead of failing. ``embeddings`` optionally supplies precomputed
+    vectors of each document's stored content (entries may be None), so
+    Chroma does not embed the same text again. Returns one
+    {"id", "status", "error"} outcome per input document, where status is
+    "upserted" or "failed".
+    """
+    if not documents:
+        return []
+    if embeddings is not None and len(embeddings) != len(documents):
+        raise ValueError("embeddings must line up with documents")
+
+    collection = get_collection(category)
+    outcomes = [None] * len(documents)
+
+    # Prepare every record first so a malformed document only fails itself
+    records = {}
+    for i, document in enumerate(documents):
+        try:
+            doc_id, content, metadata = _prepare_record(category, document, run_id)
+        except Exception as e:
+            outcomes[i] = {"id": None, "status": "failed", "error": str(e)}
+            continue
+        embedding = embeddings[i] if embeddings is not None else None
+        if embedding is not None:
+            embedding = [float(x) for x in embedding]
+        # The same id twice in one batch is rejected by Chroma; last one wins
+        records[doc_id] = (i, content, metadata, embedding)
+
+    # Vectors are always supplied so a collection's persisted embedding
+    # function (possibly a different one) is never used
+    missing = [doc_id for doc_id, record in records.items() if record[3] is None]
+    embedding_function = get_embedding_function()
+    if missing and embedding_function is not None:
+        vectors = embedding_function([records[doc_id][1] for doc_id in missing])
+        for doc_id, vector in zip(missing, vectors):
+            i, content, metadata, _ = records[doc_id]
+            records[doc_id] = (i, content, metadata, vector)
+
+    pending = list(records.items())
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        try:
+            _upsert(collection, batch)
+            for doc_id, record in batch:
+                outcomes[record[0]] = {"id": doc_id, "status": "upserted", "error": None}
+        except Exception as batch_error:
+            print(f"⚠️ Batch upsert to '{category}' failed ({batch_error}), retrying one by one")
+            for doc_id, record in batch:
+                try:
+                    _upsert(collection, [(doc_id, record)])
+                    outcomes[record[0]] = {"id": doc_id, "status": "upserted", "error": None}
+                except Exception as e:
+                    outcomes[record[0]] = {"id": doc_id, "status": "failed", "error": str(e)}
+
+    # Inputs that collapsed onto another input's id share its outcome
+    for i, document in enumerate(documents):
+        if outcomes[i] is None:
+            doc_id = stable_document_id(category, document)
+            outcomes[i] = dict(outcomes[records[doc_id][0]])
+
+    upserted = sum(1 for o in outcomes if o["status"] == "upserted")
+    print(f"✅ Upserted {upserted}/{len(documents)} documents into '{category}'")
+    return outcomes
+
+
+def add_document(category: str, document: dict, run_id: Optional[str] = None):
+    print("Adding document to ChromaDB collection...", category)
+    """
+    Add a document to the appropriate ChromaDB collection.
+    Automatically includes date_inserted (and inserted_at as a numeric
+    timestamp for range filters) in metadata; run_id tags the pipeline run
+    that wrote it. Returns the document id, or None if the write failed.
+    """
+    try:
+        outcome = add_documents(category, [document], run_id=run_id)[0]
+        if outcome["status"] != "upserted":
+            raise RuntimeError(outcome["error"])
+
+        print(f"✅ Document successfully added to '{category}' with ID: {outcome['id']}")
+        return outcome["id"]
 
     except Exception as e:
         print(f"❌ Failed to add document to '{category}' collection: {e}")
+        return None
 
 
-def get_documents(category):
-    if category not in collections:
-        raise ValueError(f"Unknown category: {category}")
-    results = collections[category].query(query_texts=["*"])
-    return results["documents"], results["metadatas"]
+def _get_write_pool() -> ThreadPoolExecutor:
+    global _write_pool
+    with _lock:
+        if _write_pool is None:
+            # One thread keeps writes in submission order; pending writes are
+            # still flushed when the interpreter exits
+            _write_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chroma-write")
+        return _write_pool
+
+
+def add_document_async(category: str, document: dict, run_id: Optional[str] = None) -> Future:
+    """
+    add_document on a background writer thread, so the caller does not wait
+    for Chroma (or for the content to be embedded). Returns a Future that
+    resolves to the document id, or None if the write failed.
+    """
+    if not CHROMA_ASYNC_WRITES:
+        future = Future()
+        future.set_result(add_document(category, document, run_id))
+        return future
+    return _get_write_pool().submit(add_document, category, document, run_id)
+
+
+def touch_documents(category: str, ids: List[str]) -> bool:
+    """
+    Mark records as current (inserted_at / date_inserted set to now) without
+    rewriting or re-embedding them; Chroma merges the metadata update.
+    """
+    if not ids:
+        return True
+    metadata = {"date_inserted": datetime.now().strftime("%Y-%m-%d"), "inserted_at": time.time()}
+    try:
+        get_collection(category).update(ids=list(ids), metadatas=[dict(metadata) for _ in ids])
+        return True
+    except Exception as e:
+        print(f"❌ Failed to refresh {len(ids)} records in '{category}': {e}")
+        return False
+
+
+def touch_documents_async(category: str, ids: List[str]) -> Future:
+    """touch_documents on the background writer thread, behind earlier writes."""
+    if not CHROMA_ASYNC_WRITES:
+        future = Future()
+        future.set_result(touch_documents(category, ids))
+        return future
+    return _get_write_pool().submit(touch_documents, category, ids)
+
+
+def _build_where(where: Optional[dict] = None, **filters) -> Optional[dict]:
+    """Combine a raw Chroma where clause with simple field filters."""
+    clauses = [{key: value} for key, value in filters.items() if value is not None]
+    if where:
+        clauses.append(where)
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def get_records(
+    category: str,
+    ids: Optional[List[str]] = None,
+    where: Optional[dict] = None,
+    run_id: Optional[str] = None,
+    date_inserted: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    include_embeddings: bool = False,
+) -> List[dict]:
+    """
+    Fetch records by id and/or metadata without any embedding or ANN search.
+    Returns a list of {"id", "document", "metadata"} dicts (plus "embedding"
+    when include_embeddings is set); ids come back in the order they were
+    requested.
+    """
+    if ids is not None and not ids:
+        return []
+
+    include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+    results = get_collection(category).get(
+        ids=ids,
+        where=_build_where(where, run_id=run_id, date_inserted=date_inserted),
+        limit=limit,
+        offset=offset,
+        include=include,
+    )
+    records = [
+        {"id": doc_id, "document": doc, "metadata": meta or {}}
+        for doc_id, doc, meta in zip(results["ids"], results["documents"], results["metadatas"])
+    ]
+    if include_embeddings:
+        for record, embedding in zip(records, results["embeddings"]):
+            record["embedding"] = embedding
+    if ids is not None:
+        position = {doc_id: i for i, doc_id in enumerate(ids)}
+        records.sort(key=lambda r: position.get(r["id"], len(position)))
+    return records
+
+
+def iter_records(
+    category: str,
+    where: Optional[dict] = None,
+    offset: int = 0,
+    page_size: int = CHROMA_WRITE_BATCH_SIZE,
+    include_embeddings: bool = False,
+) -> Iterator[dict]:
+    """Every record matching ``where``, read one page of ``page_size`` at a time."""
+    while True:
+        page = get_records(
+            category, where=where, limit=page_size, offset=offset, include_embeddings=include_embeddings
+        )
+        yield from page
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+
+def get_documents(category, ids=None, where=None, limit=DEFAULT_DOCUMENT_LIMIT, offset=None):
+    """
+    Same filters as get_records, returned as flat (documents, metadatas)
+    lists. Returns DEFAULT_DOCUMENT_LIMIT records unless ``limit`` says
+    otherwise; ``limit=None`` pages through every matching record.
+    """
+    if limit is None and ids is None:
+        records = list(iter_records(category, where=where, offset=offset or 0))
+    else:
+        records = get_records(category, ids=ids, where=where, limit=limit, offset=offset)
+    return [r["document"] for r in records], [r["metadata"] for r in records]
+
+
+def get_latest_documents(category: str, n: int = 1, since: Optional[float] = None) -> List[dict]:
+    """
+    Most recently inserted records, newest first (defaults to the last 24 hours).
+
+    Chroma cannot sort, so the window is widened from LATEST_FIRST_WINDOW
+    seconds, doubling until it holds ``n`` records or reaches ``since``;
+    only metadata is read while searching, and documents just for the
+    ``n`` records returned.
+    """
+    now = time.time()
+    since = since if since is not None else now - 24 * 3600
+    collection = get_collection(category)
+    window = LATEST_FIRST_WINDOW
+    while True:
+        start = max(since, now - window)
+        found = collection.get(where={"inserted_at": {"$gte": start}}, include=["metadatas"])
+        if len(found["ids"]) >= n or start <= since:
+            break
+        window *= 2
+
+    newest = sorted(
+        zip(found["ids"], found["metadatas"]),
+        key=lambda item: (item[1] or {}).get("inserted_at", 0),
+        reverse=True,
+    )[:n]
+    return get_records(category, ids=[doc_id for doc_id, _ in newest])
+
+
+def query_by_embedding(
+    category: str,
+    embeddings: List[List[float]],
+    n_results: int = 10,
+    where: Optional[dict] = None,
+    include_embeddings: bool = False,
+) -> List[List[dict]]:
+    """
+    Nearest-neighbour search with caller-supplied (L2-normalised) query
+    vectors. Returns one list of {"id", "document", "metadata", "distance"}
+    dicts per query (plus "embedding" when include_embeddings is set), with
+    distance as cosine distance whatever the collection's space.
+    """
+    if len(embeddings) == 0:
+        return []
+
+    include = ["documents", "metadatas", "distances"]
+    if include_embeddings:
+        include.append("embeddings")
+    collection = get_collection(category)
+    results = collection.query(
+        query_embeddings=[list(map(float, e)) for e in embeddings],
+        n_results=n_results,
+        where=where,
+        include=include,
+    )
+    # Callers treat distances as cosine distances (1 - similarity); on unit
+    # vectors Chroma's squared l2 is twice that and ip is already equal
+    scale = 0.5 if distance_space(collection) == "l2" else 1.0
+
+    matches = []
+    for q in range(len(results["ids"])):
+        rows = []
+        for i, doc_id in enumerate(results["ids"][q]):
+            row = {
+                "id": doc_id,
+                "document": results["documents"][q][i],
+                "metadata": results["metadatas"][q][i] or {},
+                "distance": results["distances"][q][i] * scale,
+            }
+            if include_embeddings:
+                row["embedding"] = results["embeddings"][q][i]
+            rows.append(row)
+        matches.append(rows)
+    return matches
+
+
+def set_client(client):
+    """Point the storage layer at another Chroma client (e.g. an in-process one)."""
+    global _client
+    with _lock:
+        _client = client
+        _collections.clear()
+
+
+if __name__ == "__main__":
+    import sys
 
+    if sys.argv[1:2] != ["migrate"]:
+        sys.exit("usage: python -m storage.chroma_db migrate [category ...]")
+    for category in sys.argv[2:] or list(COLLECTION_NAMES):
+        try:
+            migrate_collection(category)
+        except NotFoundError:
+            print(f"Skipping '{category}': no collection yet")
@@ -0,0 +1,200 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Constants
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".cache/embeddings")
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "10000"))
+# SQLite caps the number of ? parameters in one statement
+LOOKUP_BATCH = 500
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding store for one model.
+
+    Vectors are float32 BLOBs in SQLite keyed by text hash, so several
+    processes (Streamlit workers, the CLI, benchmarks) can share one cache
+    file safely; an LRU dict keeps the hottest vectors in memory.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        dim: int,
+        cache_dir: str = EMBEDDING_CACHE_DIR,
+        memory_items: int = EMBEDDING_CACHE_MEMORY_ITEMS,
+    ):
+        self.model_name = model_name
+        self.dim = dim
+        self.memory_items = memory_items
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        safe_name = re.sub(r"[^\w.-]", "_", model_name)
+        self.path = os.path.join(cache_dir, f"{safe_name}.sqlite3")
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._db.commit()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _read(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        for start in range(0, len(keys), LOOKUP_BATCH):
+            batch = keys[start:start + LOOKUP_BATCH]
+            rows = self._db.execute(
+                f"SELECT key, vector FROM vectors WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            for key, blob in rows:
+                vector = np.frombuffer(blob, dtype=np.float32)
+                # A vector of another width means the model changed under the same name
+                if vector.shape == (self.dim,):
+                    found[key] = vector.copy()
+        return found
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Return cached vectors for texts, None where the text was never seen."""
+        keys = [hash_text(text) for text in texts]
+        with self._lock:
+            on_disk = self._read(list({key for key in keys if key not in self._memory}))
+            results: List[Optional[np.ndarray]] = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    results.append(self._memory[key])
+                elif key in on_disk:
+                    self._remember(key, on_disk[key])
+                    self.disk_hits += 1
+                    results.append(on_disk[key])
+                else:
+                    self.misses += 1
+                    results.append(None)
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray):
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = hash_text(text)
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes()))
+            # Same text, same vector: whichever process wrote it first wins
+            self._db.executemany("INSERT OR IGNORE INTO vectors (key, vector) VALUES (?, ?)", rows)
+            self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "model": self.model_name,
+            "entries": entries,
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / total if total else 0.0,
+        }
+
+
+class CachedEncoder:
+    """
+    Drop-in wrapper around a SentenceTransformer whose ``encode`` reads
+    through the embedding cache and only runs the model on unseen texts.
+    """
+
+    def __init__(self, model, model_name: str, cache: Optional[EmbeddingCache] = None):
+        self.model = model
+        self.model_name = model_name
+        self.cache = cache or get_embedding_cache(
+            model_name, model.get_sentence_embedding_dimension()
+        )
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.cache.dim
+
+    def encode(
+        self,
+        sentences,
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        convert_to_tensor: bool = False,
+        normalize_embeddings: bool = False,
+        show_progress_bar: bool = False,
+        **kwargs,
+    ):
+        if convert_to_tensor:
+            # Tensor callers bypass the cache rather than paying a copy
+            return self.model.encode(
+                sentences, batch_size=batch_size, convert_to_tensor=True,
+                normalize_embeddings=normalize_embeddings,
+                show_progress_bar=show_progress_bar, **kwargs,
+            )
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        cached = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if missing:
+            # De-duplicate so a repeated headline is only encoded once
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            encoded = self.model.encode(
+                unique_texts, batch_size=batch_size, convert_to_numpy=True,
+                show_progress_bar=show_progress_bar, **kwargs,
+            )
+            self.cache.put_many(unique_texts, encoded)
+            by_text = dict(zip(unique_texts, encoded))
+            for i in missing:
+                cached[i] = np.asarray(by_text[texts[i]], dtype=np.float32)
+
+        embeddings = (
+            np.vstack(cached).astype(np.float32)
+            if cached else np.zeros((0, self.cache.dim), dtype=np.float32)
+        )
+        if normalize_embeddings and len(embeddings):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+
+        return embeddings[0] if single else embeddings
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name: str, dim: int) -> EmbeddingCache:
+    """Return the process-wide cache for a model so every encoder shares it."""
+    with _caches_lock:
+        if model_name not in _caches:
+            _caches[model_name] = EmbeddingCache(model_name, dim)
+        return _caches[model_name]
+
+
+def embedding_cache_stats() -> List[dict]:
+    return [cache.stats() for cache in _caches.values()]
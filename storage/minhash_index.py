@@ -0,0 +1,154 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+NEAR_DUP_INDEX_PATH = os.getenv("NEAR_DUP_INDEX_PATH", ".cache/near_duplicates.sqlite3")
+# Estimated Jaccard similarity of shingle sets above which two articles are the same story
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.6"))
+# Signatures older than this are dropped from the on-disk index
+NEAR_DUP_MAX_AGE_HOURS = float(os.getenv("NEAR_DUP_MAX_AGE_HOURS", "48"))
+NUM_PERM = 128
+# 32 bands of 4 rows: pairs around Jaccard 0.42 and up become candidates
+NUM_BANDS = 32
+SHINGLE_WORDS = 3
+# Expired signatures are pruned at most this often (seconds), not on every add
+PRUNE_INTERVAL = 600
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(1)
+# a, b < 2**31 and 32-bit shingle hashes keep a * x + b inside uint64
+_PERM_A = _rng.integers(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_WORD = re.compile(r"\w+")
+
+
+def shingles(*texts: str, size: int = SHINGLE_WORDS) -> np.ndarray:
+    """Hashes of the distinct word n-grams across ``texts``."""
+    hashes = set()
+    for text in texts:
+        words = _WORD.findall((text or "").lower())
+        if 0 < len(words) < size:
+            hashes.add(zlib.crc32(" ".join(words).encode("utf-8")))
+        for i in range(len(words) - size + 1):
+            hashes.add(zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")))
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+def minhash(*texts: str) -> Optional[np.ndarray]:
+    """MinHash signature of the texts' shingles, or None if they have no words."""
+    hashed = shingles(*texts)
+    if not len(hashed):
+        return None
+    permuted = (np.outer(hashed, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float(np.mean(a == b))
+
+
+def _band_keys(signature: np.ndarray) -> List[Tuple[int, str]]:
+    rows = NUM_PERM // NUM_BANDS
+    return [
+        (band, signature[band * rows:(band + 1) * rows].tobytes().hex())
+        for band in range(NUM_BANDS)
+    ]
+
+
+class MinHashIndex:
+    """
+    Locality-sensitive hashing index over MinHash signatures, in SQLite:
+    an on-disk file for the stored corpus, or ":memory:" for one request.
+    Each signature is split into bands; articles sharing any band bucket
+    are candidates, confirmed by their estimated Jaccard similarity.
+    """
+
+    def __init__(self, path: str = ":memory:", max_age_hours: Optional[float] = None):
+        self.max_age_hours = max_age_hours
+        self._last_prune = 0.0
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            " key TEXT PRIMARY KEY, signature BLOB NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS signatures_stored ON signatures (stored_at)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (band INTEGER, bucket TEXT, key TEXT,"
+            " PRIMARY KEY (band, bucket, key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS buckets_key ON buckets (key)")
+        self._db.commit()
+
+    def add(self, key: str, signature: np.ndarray):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO signatures (key, signature, stored_at) VALUES (?, ?, ?)",
+                (key, signature.tobytes(), time.time()),
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO buckets (band, bucket, key) VALUES (?, ?, ?)",
+                [(band, bucket, key) for band, bucket in _band_keys(signature)],
+            )
+            now = time.time()
+            if self.max_age_hours is not None and now - self._last_prune >= PRUNE_INTERVAL:
+                self._prune(now - self.max_age_hours * 3600)
+                self._last_prune = now
+            self._db.commit()
+
+    def _prune(self, cutoff: float):
+        self._db.execute(
+            "DELETE FROM buckets WHERE key IN (SELECT key FROM signatures WHERE stored_at < ?)", (cutoff,)
+        )
+        self._db.execute("DELETE FROM signatures WHERE stored_at < ?", (cutoff,))
+
+    def query(
+        self,
+        signature: np.ndarray,
+        threshold: float = NEAR_DUP_THRESHOLD,
+        exclude: Iterable[str] = (),
+    ) -> List[Tuple[float, str]]:
+        """(similarity, key) of indexed near-duplicates, most similar first."""
+        excluded = set(exclude)
+        clause = " OR ".join(["(band = ? AND bucket = ?)"] * NUM_BANDS)
+        params = [value for pair in _band_keys(signature) for value in pair]
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, signature FROM signatures WHERE key IN"
+                f" (SELECT DISTINCT key FROM buckets WHERE {clause})",
+                params,
+            ).fetchall()
+
+        matches = []
+        for key, blob in rows:
+            if key in excluded:
+                continue
+            score = similarity(signature, np.frombuffer(blob, dtype=np.uint64))
+            if score >= threshold:
+                matches.append((score, key))
+        matches.sort(reverse=True)
+        return matches
+
+
+_corpus_index = None
+_corpus_lock = threading.Lock()
+
+
+def get_corpus_index() -> MinHashIndex:
+    """On-disk index of the articles processed by earlier requests."""
+    global _corpus_index
+    with _corpus_lock:
+        if _corpus_index is None:
+            _corpus_index = MinHashIndex(NEAR_DUP_INDEX_PATH, max_age_hours=NEAR_DUP_MAX_AGE_HOURS)
+        return _corpus_index
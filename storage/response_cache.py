@@ -0,0 +1,168 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Hashable, Optional, Sequence
+
+# Revalidations in flight per process are capped by this many threads
+MAX_REVALIDATIONS = 4
+
+
+def make_key(parts: Sequence[Hashable]) -> str:
+    return json.dumps(list(parts), sort_keys=True, separators=(",", ":"))
+
+
+class ResponseCache:
+    """
+    Persistent key/value cache for upstream responses, stored in SQLite so
+    it survives restarts.
+
+    Entries are fresh for ``ttl`` seconds. For ``stale_ttl`` seconds after
+    that they are still served, while one background refresh replaces them
+    (stale-while-revalidate). With ``max_entries`` set, the least recently
+    used entries are evicted once the cache grows past it.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        max_entries: Optional[int] = None,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._revalidating = set()
+        self._revalidation_slots = threading.BoundedSemaphore(MAX_REVALIDATIONS)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, key: str):
+        """Return (value, age_seconds) or None, without touching the counters."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            self._db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return json.loads(row[0]), now - row[1]
+
+    def get_fresh(self, key: str):
+        """Return the value if it is within the TTL (counted as a hit), else None (a miss)."""
+        cached = self.get(key)
+        if cached is not None and cached[1] <= self.ttl:
+            self.hits += 1
+            return cached[0]
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            if self.max_entries:
+                self._db.execute(
+                    "DELETE FROM entries WHERE key IN ("
+                    " SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self._db.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._db.commit()
+
+    def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], object],
+        cacheable: Callable[[object], bool] = lambda value: True,
+    ):
+        """
+        Serve ``key`` from the cache when possible, otherwise call ``fetch``
+        and store its result if ``cacheable(result)``.
+        """
+        if not self.enabled:
+            return fetch()
+
+        cached = self.get(key)
+        if cached is not None:
+            value, age = cached
+            if age <= self.ttl:
+                self.hits += 1
+                return value
+            if age <= self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._revalidate(key, fetch, cacheable)
+                return value
+
+        self.misses += 1
+        value = fetch()
+        if cacheable(value):
+            self.set(key, value)
+        return value
+
+    def _revalidate(self, key: str, fetch: Callable[[], object], cacheable):
+        with self._lock:
+            if key in self._revalidating:
+                return
+            if not self._revalidation_slots.acquire(blocking=False):
+                return
+            self._revalidating.add(key)
+            self.revalidations += 1
+
+        def refresh():
+            try:
+                value = fetch()
+                if cacheable(value):
+                    self.set(key, value)
+            except Exception as e:
+                print(f"⚠️ Background refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+                self._revalidation_slots.release()
+
+        threading.Thread(target=refresh, name="cache-revalidate", daemon=True).start()
+
+    def stats(self) -> dict:
+        served = self.hits + self.stale_hits
+        total = served + self.misses
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "hit_ratio": served / total if total else 0.0,
+        }
@@ -0,0 +1,45 @@
+import os
+import zlib
+
+from storage import article_store
+from storage.article_store import ArticleStore
+
+
+def _clock(monkeypatch, start=1000.0):
+    now = [start]
+    monkeypatch.setattr(article_store.time, "time", lambda: now[0])
+    return now
+
+
+def test_round_trip_with_validators(tmp_path, monkeypatch):
+    now = _clock(monkeypatch)
+    store = ArticleStore(str(tmp_path / "articles.sqlite3"))
+    assert store.get("https://example.com/a") is None
+    store.put("https://example.com/a", "Body text", etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    now[0] += 30
+    stored = store.get("https://example.com/a")
+    assert (stored.text, stored.etag, stored.age) == ("Body text", '"v1"', 30)
+    store.mark_validated("https://example.com/a")
+    assert store.get("https://example.com/a").age == 0
+    assert store.stats()["not_modified"] == 1
+
+
+def test_least_recently_read_bodies_are_evicted(tmp_path, monkeypatch):
+    now = _clock(monkeypatch)
+    bodies = {f"https://example.com/{i}": os.urandom(512).hex() for i in range(3)}
+    size = max(len(zlib.compress(body.encode("utf-8"), 6)) for body in bodies.values())
+    # Room for two bodies, not three
+    store = ArticleStore(str(tmp_path / "articles.sqlite3"), max_bytes=int(size * 2.5))
+    for url in list(bodies)[:2]:
+        store.put(url, bodies[url])
+        now[0] += 1
+    store.get("https://example.com/0")
+    now[0] += 1
+    store.put("https://example.com/2", bodies["https://example.com/2"])
+
+    assert store.get("https://example.com/1") is None
+    assert store.get("https://example.com/0").text == bodies["https://example.com/0"]
+    assert store.get("https://example.com/2").text == bodies["https://example.com/2"]
+    stats = store.stats()
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
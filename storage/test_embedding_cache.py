@@ -0,0 +1,59 @@
+import multiprocessing
+
+import numpy as np
+
+from storage.embedding_cache import EmbeddingCache
+
+DIM = 8
+
+
+def _vector(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=DIM).astype(np.float32)
+
+
+def _write(cache_dir: str, start: int):
+    cache = EmbeddingCache("model", DIM, cache_dir=cache_dir)
+    texts = [f"text {i}" for i in range(start, start + 50)]
+    cache.put_many(texts, np.stack([_vector(i) for i in range(start, start + 50)]))
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = EmbeddingCache("model", DIM, cache_dir=str(tmp_path))
+    assert cache.get_many(["a"]) == [None]
+    cache.put_many(["a"], _vector(1)[None])
+    np.testing.assert_array_equal(cache.get_many(["a"])[0], _vector(1))
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["misses"] == 1 and cache.stats()["memory_hits"] == 1
+
+
+def test_caches_sharing_a_directory_do_not_overwrite_each_other(tmp_path):
+    first = EmbeddingCache("model", DIM, cache_dir=str(tmp_path))
+    second = EmbeddingCache("model", DIM, cache_dir=str(tmp_path))
+    first.put_many(["one"], _vector(1)[None])
+    second.put_many(["two"], _vector(2)[None])
+    first.put_many(["three"], _vector(3)[None])
+
+    fresh = EmbeddingCache("model", DIM, cache_dir=str(tmp_path))
+    for text, seed in (("one", 1), ("two", 2), ("three", 3)):
+        np.testing.assert_array_equal(fresh.get_many([text])[0], _vector(seed))
+    assert fresh.disk_hits == 3
+
+
+def test_concurrent_processes(tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_write, args=(str(tmp_path), start)) for start in (0, 50, 100)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    cache = EmbeddingCache("model", DIM, cache_dir=str(tmp_path))
+    vectors = cache.get_many([f"text {i}" for i in range(150)])
+    for i, vector in enumerate(vectors):
+        np.testing.assert_array_equal(vector, _vector(i))
+
+
+def test_vectors_of_another_width_are_misses(tmp_path):
+    EmbeddingCache("model", DIM, cache_dir=str(tmp_path)).put_many(["a"], _vector(1)[None])
+    assert EmbeddingCache("model", DIM * 2, cache_dir=str(tmp_path)).get_many(["a"]) == [None]
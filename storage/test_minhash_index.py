@@ -0,0 +1,50 @@
+import time
+
+from storage import minhash_index
+from storage.minhash_index import MinHashIndex, minhash, similarity
+
+STORY = (
+    "The central bank raised interest rates by a quarter point on Wednesday, "
+    "citing persistent inflation in services and a tight labour market, "
+    "and signalled that further increases remain possible this year."
+)
+
+
+def test_signatures():
+    assert minhash("") is None
+    assert minhash("...") is None
+    signature = minhash(STORY)
+    assert signature.shape == (minhash_index.NUM_PERM,)
+    assert similarity(signature, minhash(STORY)) == 1.0
+    assert similarity(signature, minhash("A completely different story about football results")) < 0.2
+
+
+def test_query_finds_near_duplicates_only():
+    index = MinHashIndex()
+    index.add("wire", minhash(STORY))
+    index.add("other", minhash("Local team wins the cup final after extra time in a dramatic match"))
+
+    copy = minhash(STORY.replace("Wednesday", "Thursday") + " Markets fell.")
+    matches = index.query(copy)
+    assert [key for _, key in matches] == ["wire"]
+    assert matches[0][0] >= minhash_index.NEAR_DUP_THRESHOLD
+    assert index.query(copy, exclude=["wire"]) == []
+
+
+def test_old_signatures_are_pruned(tmp_path, monkeypatch):
+    index = MinHashIndex(str(tmp_path / "index.sqlite3"), max_age_hours=1)
+    real_time = time.time
+    monkeypatch.setattr(minhash_index.time, "time", lambda: real_time() - 7200)
+    index.add("old", minhash(STORY))
+    monkeypatch.setattr(minhash_index.time, "time", real_time)
+    assert index.query(minhash(STORY))
+
+    index.add("new", minhash("An unrelated article about a new museum opening downtown next spring"))
+    assert index.query(minhash(STORY)) == []
+    assert index._db.execute("SELECT COUNT(*) FROM buckets WHERE key = 'old'").fetchone()[0] == 0
+
+
+def test_index_persists(tmp_path):
+    path = str(tmp_path / "index.sqlite3")
+    MinHashIndex(path).add("wire", minhash(STORY))
+    assert [key for _, key in MinHashIndex(path).query(minhash(STORY))] == ["wire"]
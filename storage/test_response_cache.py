@@ -0,0 +1,77 @@
+import threading
+import time
+
+from storage import response_cache
+from storage.response_cache import ResponseCache, make_key
+
+
+def _clock(monkeypatch, start=1000.0):
+    now = [start]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_fresh_entries_expire_after_the_ttl(tmp_path, monkeypatch):
+    now = _clock(monkeypatch)
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttl=60)
+    key = make_key(["news", "rates"])
+    cache.set(key, {"articles": [1, 2]})
+    assert cache.get_fresh(key) == {"articles": [1, 2]}
+    now[0] += 61
+    assert cache.get_fresh(key) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    now = _clock(monkeypatch)
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttl=60, max_entries=2)
+    cache.set("a", 1)
+    now[0] += 1
+    cache.set("b", 2)
+    now[0] += 1
+    cache.get("a")
+    now[0] += 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a")[0] == 1 and cache.get("c")[0] == 3
+    assert cache.stats()["entries"] == 2
+
+
+def test_stale_entries_are_served_while_one_refresh_runs(tmp_path, monkeypatch):
+    now = _clock(monkeypatch)
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttl=60, stale_ttl=60)
+    assert cache.get_or_fetch("k", lambda: "v1") == "v1"
+
+    now[0] += 90
+    release, calls = threading.Event(), []
+
+    def refresh():
+        calls.append(1)
+        release.wait(5)
+        return "v2"
+
+    assert cache.get_or_fetch("k", refresh) == "v1"
+    assert cache.get_or_fetch("k", refresh) == "v1"
+    release.set()
+    deadline = time.monotonic() + 5
+    while cache.get("k")[0] != "v2" and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert cache.get("k")[0] == "v2"
+    assert len(calls) == 1
+    assert (cache.misses, cache.stale_hits, cache.revalidations) == (1, 2, 1)
+
+
+def test_expired_stale_entries_are_fetched_again(tmp_path, monkeypatch):
+    now = _clock(monkeypatch)
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttl=60, stale_ttl=60)
+    cache.get_or_fetch("k", lambda: "v1")
+    now[0] += 121
+    assert cache.get_or_fetch("k", lambda: "v2") == "v2"
+    assert cache.get_or_fetch("k", lambda: None, cacheable=lambda value: value is not None) == "v2"
+
+
+def test_uncacheable_results_are_not_stored(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttl=60)
+    assert cache.get_or_fetch("k", lambda: {"status": "error"}, cacheable=lambda v: v["status"] == "ok")
+    assert cache.get("k") is None
@@ -10,8 +10,16 @@ from controllers.news_controller import NewsController
 st.set_page_config(page_title="🧠 News Chat Assistant", layout="wide")
 st.title("🗞️ AI News Assistant")
 
-# Initialize controller
-controller = NewsController()
+# Initialize controller once per process; set WARM_UP_MODELS=1 to load models up front
+@st.cache_resource
+def get_controller():
+    news_controller = NewsController()
+    if os.getenv("WARM_UP_MODELS") == "1":
+        news_controller.warm_up()
+    return news_controller
+
+
+controller = get_controller()
 
 # Session state for chat history
 if "messages" not in st.session_state:
@@ -32,43 +40,59 @@ if prompt := st.chat_input("Ask about a topic (e.g., Tesla AI, ChatGPT, etc.)"):
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    # Show spinner and start backend fetch
+    # Stream pipeline progress into a status box and the story into the message as it is written
     with st.chat_message("assistant"):
-        with st.spinner("Searching and writing a story..."):
-            # Temporarily show "Thinking..." message while response loads
-            placeholder = st.empty()
-            placeholder.markdown("_Generating response..._")
-
-            try:
-                response = controller.fetch_story(prompt)
-
-                # Replace spinner placeholder with actual response
-                documents, metadatas = controller.get_documents(category="news_stories")
-
-                if documents and metadatas:
-                    latest_doc = documents[0][-1]
-                    latest_meta = metadatas[0][-1]
-
-                    story = latest_doc.get("story") or latest_meta.get("generated_story", "")
-                    events = latest_meta.get("events", "")
-
-                    if story:
-                        st.markdown("### 🧠 Generated Story")
-                        st.markdown(story)
-
-                        if events:
-                            with st.expander("📌 Events used"):
-                                st.markdown(events)
-
-                        st.session_state.messages.append({"role": "assistant", "content": story})
-                    else:
-                        st.error("⚠️ No story found in the latest document.")
-
+        status = st.status("Searching and writing a story...", expanded=False)
+        placeholder = st.empty()
+        placeholder.markdown("_Generating response..._")
+
+        try:
+            response = None
+            streamed = ""
+            for event in controller.stream_story(prompt):
+                if event["type"] == "progress":
+                    status.update(label=event["message"])
+                    status.write(event["message"])
+                elif event["type"] == "token":
+                    streamed += event["text"]
+                    placeholder.markdown("### 🧠 Generated Story\n\n" + streamed + "▌")
+                elif event["type"] == "result":
+                    response = event["result"]
+
+            if response.status != "success":
+                status.update(label="Failed", state="error")
+                placeholder.empty()
+                st.error(f"⚠️ {response.error}")
+                st.session_state.messages.append({"role": "assistant", "content": response.error})
+            elif response.story:
+                status.update(label="Done", state="complete")
+                placeholder.markdown("### 🧠 Generated Story\n\n" + response.story)
+                if response.cached:
+                    st.caption(
+                        f"♻️ Answered from a recent similar question "
+                        f"(similarity {response.similarity:.2f})"
+                    )
                 else:
-                    st.error("⚠️ No documents found in news_stories collection.")
-
-            except Exception as e:
-                error_msg = f"❌ Something went wrong: {e}"
-                st.error(error_msg)
-                st.session_state.messages.append({"role": "assistant", "content": error_msg})
-
+                    st.caption(" · ".join(f"{stage} {seconds:.1f}s" for stage, seconds in response.timings.items()))
+
+                if response.events:
+                    with st.expander("📌 Events used"):
+                        st.markdown("\n".join(f"- {event}" for event in response.events))
+
+                if response.sources:
+                    with st.expander("🔗 Sources"):
+                        st.markdown("\n".join(
+                            f"- [{source.get('title') or source['url']}]({source['url']})"
+                            for source in response.sources
+                        ))
+
+                st.session_state.messages.append({"role": "assistant", "content": response.story})
+            else:
+                status.update(label="Done", state="complete")
+                placeholder.empty()
+                st.error("⚠️ No story was generated.")
+
+        except Exception as e:
+            error_msg = f"❌ Something went wrong: {e}"
+            st.error(error_msg)
+            st.session_state.messages.append({"role": "assistant", "content": error_msg})